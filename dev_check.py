@@ -2,60 +2,122 @@
 Development helper script
 Run this to check if everything is set up correctly
 """
+import io
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 
+# Per-thread output buffer so concurrent checks print in a stable order
+_output = threading.local()
+
+
+def _echo(message=""):
+    """Print to the current check's buffer (stdout outside of a check)"""
+    print(message, file=getattr(_output, "buffer", None) or sys.stdout)
+
+
+def _run_check(check):
+    """Run a check with its output captured; returns (passed, output)"""
+    _output.buffer = io.StringIO()
+    try:
+        return check(), _output.buffer.getvalue()
+    finally:
+        _output.buffer = None
+
+
 def check_python_version():
     """Check Python version"""
     version = sys.version_info
     if version.major == 3 and version.minor >= 10:
-        print(f"✓ Python {version.major}.{version.minor}.{version.micro}")
+        _echo(f"✓ Python {version.major}.{version.minor}.{version.micro}")
         return True
     else:
-        print(f"✗ Python {version.major}.{version.minor} (need 3.10+)")
+        _echo(f"✗ Python {version.major}.{version.minor} (need 3.10+)")
         return False
 
 
-def check_docker():
-    """Check if Docker is running"""
+def _run_with_hard_timeout(cmd, timeout):
+    """
+    Run a command and return (returncode, stdout), or None on timeout.
+    The child is terminated (then killed) and reaped if it overruns, so a
+    hung docker daemon cannot block past the budget.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        out, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.terminate()
+        try:
+            proc.communicate(timeout=1)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+        return None
+    return proc.returncode, out
+
+
+@lru_cache(maxsize=1)
+def _docker_ps_once():
+    """
+    Run `docker ps` once and cache (daemon reachable, container names, error).
+    error is set when docker could not be run at all (e.g. not installed).
+    """
     try:
-        result = subprocess.run(
-            ["docker", "ps"],
-            capture_output=True,
-            text=True,
-            timeout=5
+        result = _run_with_hard_timeout(
+            ["docker", "ps", "--format", "{{.Names}}"],
+            timeout=5,
         )
-        if result.returncode == 0:
-            print("✓ Docker is running")
-            return True
-        else:
-            print("✗ Docker is not running")
-            return False
     except Exception as e:
-        print(f"✗ Docker not found: {e}")
+        return False, frozenset(), e
+    if result is None or result[0] != 0:
+        return False, frozenset(), None
+    return True, frozenset(result[1].split()), None
+
+
+_docker_lock = threading.Lock()
+
+
+def _docker_status():
+    """Cached `docker ps` result, computed once even across check threads"""
+    with _docker_lock:
+        return _docker_ps_once()
+
+
+def check_docker():
+    """Check if Docker is running"""
+    ok, _, error = _docker_status()
+    if ok:
+        _echo("✓ Docker is running")
+        return True
+    elif error is not None:
+        _echo(f"✗ Docker not found: {error}")
+        return False
+    else:
+        _echo("✗ Docker is not running")
         return False
 
 
 def check_restack_container():
     """Check if Restack container is running"""
-    try:
-        result = subprocess.run(
-            ["docker", "ps", "--filter", "name=restack", "--format", "{{.Names}}"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if "restack" in result.stdout:
-            print("✓ Restack container is running")
-            return True
-        else:
-            print("✗ Restack container not found")
-            print("  Run: docker run -d --pull always --name restack -p 5233:5233 -p 6233:6233 ghcr.io/restackio/restack:main")
-            return False
-    except Exception as e:
-        print(f"✗ Cannot check Restack: {e}")
+    _, names, error = _docker_status()
+    if error is not None:
+        _echo(f"✗ Cannot check Restack: {error}")
+        return False
+    if any("restack" in name for name in names):
+        _echo("✓ Restack container is running")
+        return True
+    else:
+        _echo("✗ Restack container not found")
+        _echo("  Run: docker run -d --pull always --name restack -p 5233:5233 -p 6233:6233 ghcr.io/restackio/restack:main")
         return False
 
 
@@ -63,11 +125,11 @@ def check_env_file():
     """Check if .env file exists"""
     env_file = Path(".env")
     if env_file.exists():
-        print("✓ .env file exists")
+        _echo("✓ .env file exists")
         return True
     else:
-        print("✗ .env file not found")
-        print("  Run: cp .env.example .env")
+        _echo("✗ .env file not found")
+        _echo("  Run: cp .env.example .env")
         return False
 
 
@@ -75,11 +137,11 @@ def check_dependencies():
     """Check if dependencies are installed"""
     try:
         import restack_ai
-        print("✓ restack-ai installed")
+        _echo("✓ restack-ai installed")
         return True
     except ImportError:
-        print("✗ Dependencies not installed")
-        print("  Run: pip install -e .")
+        _echo("✗ Dependencies not installed")
+        _echo("  Run: pip install -e .")
         return False
 
 
@@ -97,14 +159,24 @@ def check_structure():
     all_exist = True
     for dir_path in required_dirs:
         if Path(dir_path).exists():
-            print(f"✓ {dir_path}/")
+            _echo(f"✓ {dir_path}/")
         else:
-            print(f"✗ {dir_path}/ missing")
+            _echo(f"✗ {dir_path}/ missing")
             all_exist = False
     
     return all_exist
 
 
+CHECKS = {
+    "Python version": check_python_version,
+    "Docker": check_docker,
+    "Restack container": check_restack_container,
+    "Environment file": check_env_file,
+    "Dependencies": check_dependencies,
+    "Project structure": check_structure,
+}
+
+
 def main():
     """Run all checks"""
     print("="*60)
@@ -112,14 +184,17 @@ def main():
     print("="*60)
     print()
     
-    checks = {
-        "Python version": check_python_version(),
-        "Docker": check_docker(),
-        "Restack container": check_restack_container(),
-        "Environment file": check_env_file(),
-        "Dependencies": check_dependencies(),
-        "Project structure": check_structure(),
-    }
+    # Checks are independent, so run them concurrently and replay their
+    # output in declaration order
+    with ThreadPoolExecutor(max_workers=len(CHECKS)) as executor:
+        futures = {
+            name: executor.submit(_run_check, check)
+            for name, check in CHECKS.items()
+        }
+        checks = {}
+        for name, future in futures.items():
+            checks[name], output = future.result()
+            print(output, end="")
     
     print()
     print("="*60)
@@ -2,6 +2,7 @@
 Example: Custom task with custom planner
 """
 import asyncio
+import time
 from restack_ai import Restack
 from src.models import Task, Plan, PlanStep
 
@@ -64,7 +65,7 @@ async def main():
                 depends_on=["refine_ideas"]
             ),
         ],
-        created_at=asyncio.get_event_loop().time()
+        created_at=time.time()
     )
     
     await client.send_agent_event(
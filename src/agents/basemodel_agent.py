@@ -1,11 +1,15 @@
 """
 BaseModel Agent - Core agent implementation
 """
-import json
 import hashlib
+import heapq
 from datetime import timedelta
+from functools import lru_cache
 from typing import Any, Optional, Literal
-from restack_ai.agent import agent, condition, log, import_functions
+import orjson
+from pydantic import TypeAdapter
+from restack_ai.agent import agent, agent_info, condition, log, import_functions
+from temporalio.workflow import patched as workflow_patched, time_ns as workflow_time_ns
 
 from ..models import (
     BaseModelConfig,
@@ -13,9 +17,11 @@ from ..models import (
     HistoryEntry,
     Artifact,
     AgentSnapshot,
+    AgentSnapshotDelta,
     Plan,
     PlanStep,
 )
+from ..workflows.dag import run_dag
 
 # Import functions using the proper context manager
 with import_functions():
@@ -38,6 +44,63 @@ with import_functions():
     )
 
 
+# Reusable compiled (de)serializers for whole lists of models
+_HISTORY_ADAPTER = TypeAdapter(list[HistoryEntry])
+_INBOX_ADAPTER = TypeAdapter(list[Task])
+
+# Step name -> function, built once at import time
+_FUNCTION_MAP = {
+    "search_papers": search_papers,
+    "generate_ideas": generate_ideas,
+    "refine_ideas": refine_ideas,
+    "run_experiment": run_experiment,
+    "collect_results": collect_results,
+    "compile_writeup": compile_writeup,
+    "reviewer": reviewer,
+}
+
+
+def _build_plan_steps(kind: str, payload_key: tuple) -> tuple[PlanStep, ...]:
+    """Static step sequence for a task kind (see _scripted_planner)"""
+    if kind == "research":
+        (topic,) = payload_key
+        return (
+            PlanStep(name="search_papers", inputs={"query": topic}, timeout_s=30),
+            PlanStep(name="generate_ideas", inputs={"topic": topic}, timeout_s=60),
+            PlanStep(name="refine_ideas", inputs={"ideas": []}, timeout_s=60, depends_on=["generate_ideas"]),
+        )
+    elif kind == "writeup":
+        experiments, title = payload_key
+        return (
+            PlanStep(name="collect_results", inputs={"experiment_ids": list(experiments)}, timeout_s=30),
+            PlanStep(name="compile_writeup", inputs={"title": title}, timeout_s=120),
+            PlanStep(name="reviewer", inputs={"content": "", "review_type": "writeup"}, timeout_s=60, depends_on=["compile_writeup"]),
+        )
+    else:
+        # Default: simple observation
+        (content,) = payload_key
+        return (PlanStep(name="reviewer", inputs={"content": content, "review_type": "general"}, timeout_s=30),)
+
+
+# Step templates are shared between plans; steps are never mutated after planning
+_plan_template = lru_cache(maxsize=256)(_build_plan_steps)
+
+
+# Strings up to this length are ids worth memoizing; longer ones are payloads
+_SHORT_ID_CHARS = 256
+
+
+def _short_hash(data: bytes) -> str:
+    """8-hex-char digest of bytes"""
+    return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _short_id_hash(text: str) -> str:
+    """8-hex-char digest of a short id (memoized: the same ids recur)"""
+    return _short_hash(text.encode())
+
+
 @agent.defn()
 class BaseModelAgent:
     """
@@ -55,11 +118,19 @@ class BaseModelAgent:
     def __init__(self):
         # Configuration
         self.cfg: Optional[BaseModelConfig] = None
+        self._compact_threshold: int = 0  # Derived from cfg in configure()
+        self._keep_last: int = 0
+        self._allowed_tools: Optional[frozenset[str]] = None  # None = all tools allowed
+        self._cfg_dump: Optional[dict[str, Any]] = None  # Config is fixed after configure()
         
         # State
-        self.inbox: list[Task] = []
+        # Min-heap of (-priority, created_at, seq, task); seq breaks ties FIFO
+        self.inbox: list[tuple[int, float, int, Task]] = []
+        self._inbox_seq: int = 0
         self.plan: Optional[Plan] = None
+        self._plan_dump_cache: Optional[dict[str, Any]] = None  # Invalidated when plan changes
         self.history: list[HistoryEntry] = []
+        self._history_bytes: int = 0  # Running serialized size of history
         self.artifacts: dict[str, Artifact] = {}
         self.cursors: dict[str, Any] = {}  # Workflow/step tracking
         self.stats: dict[str, Any] = {
@@ -70,6 +141,13 @@ class BaseModelAgent:
             "last_snapshot": None,
         }
         
+        # Snapshot chain: deltas are written against the last saved snapshot
+        self._snapshot_seq: int = 0
+        self._last_snapshot_id: Optional[str] = None  # None = next snapshot is full
+        self._last_snapshot_history_idx: int = 0
+        self._last_snapshot_artifact_keys: frozenset[str] = frozenset()
+        self._snapshots_since_full: int = 0
+        
         # Control
         self.shutdown_flag: bool = False
         self.completed_steps: set[str] = set()  # Track completed step names
@@ -80,7 +158,11 @@ class BaseModelAgent:
     async def configure(self, config: dict[str, Any]):
         """Configure the agent"""
         self.cfg = BaseModelConfig(**config)
-        log.info(f"Agent configured: {self.cfg.agent_name}")
+        self._compact_threshold = int(self.cfg.memory_budget_chars * self.cfg.safety_margin)
+        self._keep_last = self.cfg.keep_last
+        self._allowed_tools = frozenset(self.cfg.allowed_tools) if self.cfg.allowed_tools else None
+        self._cfg_dump = self.cfg.model_dump()
+        log.info("Agent configured", agent_name=self.cfg.agent_name)
         
         # Log configuration event
         self._log_event(
@@ -93,8 +175,9 @@ class BaseModelAgent:
     async def enqueue_task(self, task: dict[str, Any]):
         """Add a task to the inbox"""
         task_obj = Task(**task)
-        self.inbox.append(task_obj)
-        log.info(f"Task enqueued: {task_obj.id} ({task_obj.kind})")
+        heapq.heappush(self.inbox, (-task_obj.priority, task_obj.created_at, self._inbox_seq, task_obj))
+        self._inbox_seq += 1
+        log.info("Task enqueued", task_id=task_obj.id, kind=task_obj.kind)
         
         self._log_event(
             kind="meta",
@@ -105,11 +188,11 @@ class BaseModelAgent:
     @agent.event
     async def inject_memory(self, frames: list[dict[str, Any]]):
         """Inject memory frames into history"""
-        for frame in frames:
-            entry = HistoryEntry(**frame)
-            self.history.append(entry)
+        entries = _HISTORY_ADAPTER.validate_python(frames)
+        self.history.extend(entries)
+        self._history_bytes += sum(e.serialized_size for e in entries)
         
-        log.info(f"Injected {len(frames)} memory frames")
+        log.info("Injected memory frames", count=len(frames))
         
         self._log_event(
             kind="meta",
@@ -121,7 +204,8 @@ class BaseModelAgent:
     async def set_plan(self, plan: dict[str, Any]):
         """Manually override the current plan"""
         self.plan = Plan(**plan)
-        log.info(f"Plan set manually: {self.plan.plan_id}")
+        self._plan_dump_cache = None
+        log.info("Plan set manually", plan_id=self.plan.plan_id)
         
         self._log_event(
             kind="plan",
@@ -154,7 +238,7 @@ class BaseModelAgent:
         5. Compact memory if needed
         6. Repeat
         """
-        log.info(f"Agent {self.cfg.agent_name if self.cfg else 'BaseModelAgent'} starting")
+        log.info("Agent starting", agent_name=self.cfg.agent_name if self.cfg else "BaseModelAgent")
         
         # Wait for configuration
         await condition(lambda: self.cfg is not None)
@@ -176,7 +260,7 @@ class BaseModelAgent:
             await self._maybe_save_snapshot()
         
         # Final snapshot on shutdown
-        await self._save_snapshot()
+        await self._save_snapshot(flush=True)
         
         log.info("Agent shutdown complete")
         
@@ -189,17 +273,16 @@ class BaseModelAgent:
     # ========== Task Processing ==========
     
     def _next_task(self) -> Optional[Task]:
-        """Get next task from inbox (priority-sorted)"""
+        """Get next task from inbox (higher priority first, then oldest)"""
         if not self.inbox:
             return None
         
-        # Sort by priority (higher first), then by created_at
-        self.inbox.sort(key=lambda t: (-t.priority, t.created_at))
-        return self.inbox.pop(0)
+        return heapq.heappop(self.inbox)[3]
     
     async def _process_task(self, task: Task):
         """Process a single task"""
-        log.info(f"Processing task: {task.id} ({task.kind})")
+        log.info("Processing task", task_id=task.id, kind=task.kind)
+        start_ns = workflow_time_ns()
         
         try:
             # Generate plan
@@ -208,19 +291,19 @@ class BaseModelAgent:
             # Execute plan
             await self._execute_plan(task)
             
-            # Mark success (no latency tracking in workflow context)
+            # Mark success (latency from replay-safe workflow time)
             self._log_event(
                 kind="obs",
                 name=f"task_completed:{task.kind}",
                 inputs_digest=task.id,
                 result_digest="success",
-                latency_ms=None,
+                latency_ms=(workflow_time_ns() - start_ns) // 1_000_000,
             )
             
             self.stats["tasks_completed"] += 1
             
         except Exception as e:
-            log.error(f"Task failed: {task.id} - {e}")
+            log.error("Task failed", task_id=task.id, error=str(e))
             self._log_event(
                 kind="error",
                 name=f"task_failed:{task.kind}",
@@ -233,7 +316,7 @@ class BaseModelAgent:
     
     async def _plan_task(self, task: Task):
         """Generate execution plan for task"""
-        log.info(f"Planning task: {task.id}")
+        log.info("Planning task", task_id=task.id)
         
         if not self.cfg:
             log.warning("Agent not configured, using default heuristic planner")
@@ -252,6 +335,7 @@ class BaseModelAgent:
                 plan = self._heuristic_planner(task)
         
         self.plan = plan
+        self._plan_dump_cache = None
         self.completed_steps.clear()  # Reset for new plan
         
         self._log_event(
@@ -263,29 +347,27 @@ class BaseModelAgent:
     
     def _scripted_planner(self, task: Task) -> Plan:
         """Scripted planner - static sequences per task kind"""
-        steps = []
-        
+        # Only the payload fields the script reads determine the steps
         if task.kind == "research":
-            steps = [
-                PlanStep(name="search_papers", inputs={"query": task.payload.get("topic", "")}, timeout_s=30),
-                PlanStep(name="generate_ideas", inputs={"topic": task.payload.get("topic", "")}, timeout_s=60),
-                PlanStep(name="refine_ideas", inputs={"ideas": []}, timeout_s=60, depends_on=["generate_ideas"]),
-            ]
+            payload_key = (task.payload.get("topic", ""),)
         elif task.kind == "writeup":
-            steps = [
-                PlanStep(name="collect_results", inputs={"experiment_ids": task.payload.get("experiments", [])}, timeout_s=30),
-                PlanStep(name="compile_writeup", inputs={"title": task.payload.get("title", "Report")}, timeout_s=120),
-                PlanStep(name="reviewer", inputs={"content": "", "review_type": "writeup"}, timeout_s=60, depends_on=["compile_writeup"]),
-            ]
+            payload_key = (
+                tuple(task.payload.get("experiments", [])),
+                task.payload.get("title", "Report"),
+            )
         else:
-            # Default: simple observation
-            steps = [PlanStep(name="reviewer", inputs={"content": str(task.payload), "review_type": "general"}, timeout_s=30)]
+            payload_key = (str(task.payload),)
+        
+        try:
+            steps = _plan_template(task.kind, payload_key)
+        except TypeError:  # Unhashable payload values
+            steps = _build_plan_steps(task.kind, payload_key)
         
         return Plan(
             plan_id=f"plan_{task.id}",
             task_id=task.id,
             mode="scripted",
-            steps=steps,
+            steps=list(steps),
             created_at=0.0,  # Timestamp not available in workflow context
         )
     
@@ -307,9 +389,22 @@ class BaseModelAgent:
             log.warning("No plan to execute")
             return
         
-        log.info(f"Executing plan: {self.plan.plan_id} ({len(self.plan.steps)} steps)")
+        log.info("Executing plan", plan_id=self.plan.plan_id, steps=len(self.plan.steps))
+        
+        # Runs started before concurrent execution replay the sequential order
+        if not workflow_patched("concurrent-plan-steps"):
+            await self._execute_plan_sequential()
+            return
         
-        # Execute steps sequentially (respecting dependencies)
+        # Run each step once its dependencies are done; independent steps run concurrently
+        executed = await run_dag(self.plan.steps, self._execute_step)
+        
+        if executed < len(self.plan.steps):
+            # Some dependencies can never be met
+            log.warning("No ready steps but plan incomplete")
+    
+    async def _execute_plan_sequential(self):
+        """Execute ready steps one at a time (pre-concurrency command order)"""
         while len(self.completed_steps) < len(self.plan.steps):
             ready_steps = self.plan.next_steps(self.completed_steps)
             
@@ -323,11 +418,11 @@ class BaseModelAgent:
     
     async def _execute_step(self, step_obj: PlanStep):
         """Execute a single plan step"""
-        log.info(f"Executing step: {step_obj.name}")
+        log.info("Executing step", step=step_obj.name)
         
         # Check tool allowlist
-        if self.cfg and self.cfg.allowed_tools and step_obj.name not in self.cfg.allowed_tools:
-            log.warning(f"Tool not allowed: {step_obj.name}")
+        if self._allowed_tools is not None and step_obj.name not in self._allowed_tools:
+            log.warning("Tool not allowed", step=step_obj.name)
             self._log_event(
                 kind="error",
                 name=step_obj.name,
@@ -346,26 +441,27 @@ class BaseModelAgent:
             
             # Execute with timeout
             timeout = timedelta(seconds=step_obj.timeout_s)
+            start_ns = workflow_time_ns()
             result = await agent.step(
                 function=func,
                 function_input=step_obj.inputs,
                 start_to_close_timeout=timeout,
             )
             
-            # Log success (no latency tracking in workflow context)
+            # Log success (latency from replay-safe workflow time)
             self._log_event(
                 kind="step",
                 name=step_obj.name,
                 inputs_digest=self._digest(step_obj.inputs),
                 result_digest=self._digest(result),
-                latency_ms=None,
+                latency_ms=(workflow_time_ns() - start_ns) // 1_000_000,
             )
             
             self.stats["steps_executed"] += 1
             self.completed_steps.add(step_obj.name)
             
         except Exception as e:
-            log.error(f"Step failed: {step_obj.name} - {e}")
+            log.error("Step failed", step=step_obj.name, error=str(e))
             self._log_event(
                 kind="error",
                 name=step_obj.name,
@@ -377,16 +473,7 @@ class BaseModelAgent:
     
     def _get_function(self, name: str):
         """Map function name to actual function"""
-        function_map = {
-            "search_papers": search_papers,
-            "generate_ideas": generate_ideas,
-            "refine_ideas": refine_ideas,
-            "run_experiment": run_experiment,
-            "collect_results": collect_results,
-            "compile_writeup": compile_writeup,
-            "reviewer": reviewer,
-        }
-        return function_map.get(name)
+        return _FUNCTION_MAP.get(name)
     
     # ========== Memory Management ==========
     
@@ -395,14 +482,11 @@ class BaseModelAgent:
         if not self.cfg:
             return
         
-        # Calculate current memory size
-        history_json = json.dumps([h.model_dump() for h in self.history])
-        current_size = len(history_json)
-        
-        threshold = int(self.cfg.memory_budget_chars * self.cfg.safety_margin)
+        # Current memory size is tracked incrementally as entries are added
+        current_size = self._history_bytes
         
-        if current_size > threshold:
-            log.info(f"Memory budget exceeded ({current_size} > {threshold}), compacting")
+        if current_size > self._compact_threshold:
+            log.info("Memory budget exceeded, compacting", size=current_size, threshold=self._compact_threshold)
             
             await self._compact_memory()
     
@@ -416,22 +500,28 @@ class BaseModelAgent:
             result = await agent.step(
                 function=memory_compactor,
                 function_input=MemoryCompactorInput(
-                    history=[h.model_dump() for h in self.history],
-                    keep_last=self.cfg.keep_last,
+                    history=_HISTORY_ADAPTER.dump_python(self.history),
+                    keep_last=self._keep_last,
                     budget_chars=self.cfg.memory_budget_chars,
                 ),
                 start_to_close_timeout=timedelta(seconds=30),
             )
             
             # Replace history
-            self.history = [HistoryEntry(**h) for h in result["compacted_history"]]
+            self.history = _HISTORY_ADAPTER.validate_python(result["compacted_history"])
+            self._last_snapshot_id = None  # History was rewritten; next snapshot must be full
+            self._history_bytes = sum(h.serialized_size for h in self.history)
             
             self.stats["last_compaction"] = 0.0  # Timestamp not available in workflow context
             
-            log.info(f"Memory compacted: {result['original_count']} -> {result['compacted_count']} entries")
+            log.info(
+                "Memory compacted",
+                original_count=result["original_count"],
+                compacted_count=result["compacted_count"],
+            )
             
         except Exception as e:
-            log.error(f"Memory compaction failed: {e}")
+            log.error("Memory compaction failed", error=str(e))
     
     # ========== Persistence ==========
     
@@ -448,43 +538,94 @@ class BaseModelAgent:
         
         await self._save_snapshot()
     
-    async def _save_snapshot(self):
-        """Save current state to snapshot"""
+    async def _save_snapshot(self, flush: bool = False):
+        """Save current state to snapshot (flush: don't wait to batch the write)"""
         if not self.cfg:
             log.warning("Cannot save snapshot: agent not configured")
             return
             
         try:
-            snapshot_id = "workflow_snapshot"  # Simple ID in workflow context
+            self._snapshot_seq += 1
+            # Deterministic in workflow context, and unique across runs of the same agent
+            # (a reused id would let later deltas chain onto another run's snapshot).
+            # Runs started before run-scoped ids keep their original ids on replay.
+            if workflow_patched("run-scoped-snapshot-ids"):
+                snapshot_id = f"snapshot_{agent_info().run_id}_{self._snapshot_seq}"
+            else:
+                snapshot_id = f"snapshot_{self._snapshot_seq}"
             
-            snapshot = AgentSnapshot(
-                snapshot_id=snapshot_id,
-                agent_name=self.cfg.agent_name,
-                timestamp=0.0,  # Timestamp not available in workflow context
-                config=self.cfg.model_dump(),
-                inbox=[t.model_dump() for t in self.inbox],
-                plan=self.plan.model_dump() if self.plan else None,
-                history=[h.model_dump() for h in self.history],
-                artifacts={k: v.model_dump() for k, v in self.artifacts.items()},
-                cursors=self.cursors,
-                stats=self.stats,
+            if self._plan_dump_cache is None and self.plan:
+                self._plan_dump_cache = self.plan.model_dump()
+            
+            # Write a full snapshot periodically (or when there is no valid
+            # parent); otherwise only what changed since the last snapshot
+            full = (
+                self._last_snapshot_id is None
+                or self._snapshots_since_full + 1 >= self.cfg.snapshot_full_every
             )
+            history_len = len(self.history)
+            artifact_keys = frozenset(self.artifacts)
+            
+            if full:
+                snapshot = AgentSnapshot(
+                    snapshot_id=snapshot_id,
+                    agent_name=self.cfg.agent_name,
+                    timestamp=0.0,  # Timestamp not available in workflow context
+                    config=self._cfg_dump,
+                    inbox=_INBOX_ADAPTER.dump_python([t for *_, t in self.inbox]),
+                    plan=self._plan_dump_cache,
+                    history=_HISTORY_ADAPTER.dump_python(self.history),
+                    artifacts={k: v.model_dump() for k, v in self.artifacts.items()},
+                    cursors=self.cursors,
+                    stats=self.stats,
+                )
+            else:
+                start = self._last_snapshot_history_idx
+                snapshot = AgentSnapshotDelta(
+                    snapshot_id=snapshot_id,
+                    parent_snapshot_id=self._last_snapshot_id,
+                    agent_name=self.cfg.agent_name,
+                    timestamp=0.0,  # Timestamp not available in workflow context
+                    inbox=_INBOX_ADAPTER.dump_python([t for *_, t in self.inbox]),
+                    plan=self._plan_dump_cache,
+                    history_start=start,
+                    history=_HISTORY_ADAPTER.dump_python(self.history[start:]),
+                    artifacts={
+                        k: self.artifacts[k].model_dump()
+                        for k in artifact_keys - self._last_snapshot_artifact_keys
+                    },
+                    cursors=self.cursors,
+                    stats=self.stats,
+                )
             
-            await agent.step(
+            result = await agent.step(
                 function=save_snapshot,
                 function_input=SaveSnapshotInput(
                     snapshot=snapshot.model_dump(),
                     snapshot_dir=self.cfg.snapshot_dir,
+                    format=self.cfg.snapshot_format,
+                    compression=self.cfg.snapshot_compression,
+                    batch_size=self.cfg.snapshot_batch_size,
+                    flush_interval_ms=self.cfg.snapshot_flush_interval_ms,
+                    flush_now=flush,
                 ),
                 start_to_close_timeout=timedelta(seconds=30),
             )
+            if not result["success"]:
+                raise RuntimeError(result["error"])
+            
+            self._last_snapshot_id = snapshot_id
+            self._last_snapshot_history_idx = history_len
+            self._last_snapshot_artifact_keys = artifact_keys
+            self._snapshots_since_full = 0 if full else self._snapshots_since_full + 1
             
             self.stats["last_snapshot"] = self.stats["steps_executed"]
             
-            log.info(f"Snapshot saved: {snapshot_id}")
+            log.info("Snapshot saved", snapshot_id=snapshot_id, full=full)
             
         except Exception as e:
-            log.error(f"Snapshot save failed: {e}")
+            self._last_snapshot_id = None  # Don't chain deltas onto a missing parent
+            log.error("Snapshot save failed", error=str(e))
     
     # ========== Utilities ==========
     
@@ -507,11 +648,20 @@ class BaseModelAgent:
             error=error,
         )
         self.history.append(entry)
+        self._history_bytes += entry.serialized_size
     
     def _digest(self, obj: Any) -> str:
         """Create short digest of object"""
+        # Ids and raw payloads skip JSON serialization entirely
+        if isinstance(obj, str):
+            if len(obj) <= _SHORT_ID_CHARS:
+                return _short_id_hash(obj)
+            return _short_hash(obj.encode())
+        if isinstance(obj, bytes):
+            return _short_hash(obj)
         try:
-            s = json.dumps(obj, sort_keys=True, default=str)
-            return hashlib.md5(s.encode()).hexdigest()[:8]
+            return _short_hash(
+                orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+            )
         except Exception:
             return str(obj)[:16]
@@ -14,7 +14,27 @@ from .tools import (
     reviewer,
 )
 
+# Every function the service registers
+ALL_TOOLS = (
+    # Memory & persistence
+    save_snapshot,
+    load_snapshot,
+    memory_compactor,
+    token_count,
+    # Research tools
+    search_papers,
+    generate_ideas,
+    refine_ideas,
+    # Execution tools
+    run_experiment,
+    collect_results,
+    # Writing tools
+    compile_writeup,
+    reviewer,
+)
+
 __all__ = [
+    "ALL_TOOLS",
     "save_snapshot",
     "load_snapshot",
     "memory_compactor",
@@ -1,10 +1,20 @@
 """
 Memory compaction function for history management
 """
+import asyncio
+import hashlib
+import math
 from typing import Any
 from restack_ai.function import function, log
-from pydantic import BaseModel
-import json
+from pydantic import BaseModel, Field
+import orjson
+
+# Compaction tiers, in the order their entries appear in compacted history
+TIERS = ("persistent", "session", "ephemeral")
+
+# Summary kind counters packed into one int, 32 bits per kind
+_KIND_DELTA = {"plan": 1, "step": 1 << 32, "obs": 1 << 64, "error": 1 << 96}
+_LANE_MASK = (1 << 32) - 1
 
 
 class MemoryCompactorInput(BaseModel):
@@ -12,6 +22,14 @@ class MemoryCompactorInput(BaseModel):
     history: list[dict[str, Any]]  # Serialized HistoryEntry list
     keep_last: int = 5
     budget_chars: int = 16000
+    target_ratio: float = Field(default=0.5, gt=0)  # Compact down to this share of budget_chars
+    # Share of the post-compaction head budget given to each tier
+    persistent_budget_pct: float = Field(default=10, ge=0)
+    session_budget_pct: float = Field(default=30, ge=0)
+    ephemeral_budget_pct: float = Field(default=60, ge=0)
+    # Retention score = exp(-age / tau_seconds) * importance
+    tau_seconds: float = Field(default=3600, gt=0)
+    importance_weights: dict[str, float] = {"error": 2.0, "key": 1.0, "default": 0.5}
 
 
 class MemoryCompactorOutput(BaseModel):
@@ -27,20 +45,32 @@ class MemoryCompactorOutput(BaseModel):
 async def memory_compactor(input: MemoryCompactorInput) -> MemoryCompactorOutput:
     """
     Compact history when memory budget exceeded.
-    Strategy: Keep last N entries verbatim, summarize older entries.
+    Strategy: Keep last N entries verbatim. Older entries are deduplicated
+    by (kind, name, inputs_digest), then split into
+    persistent (meta/plan), session (key steps) and ephemeral (everything
+    else) tiers, each fitted to its own share of the budget by time-decayed
+    importance; entries that do not fit are summarized per tier.
+    The work is CPU-bound, so it runs in a thread off the event loop.
     """
+    return await asyncio.to_thread(_compact, input)
+
+
+def _compact(input: MemoryCompactorInput) -> MemoryCompactorOutput:
+    """Synchronous body of memory_compactor"""
     history = input.history
     keep_last = input.keep_last
     
     original_count = len(history)
-    chars_before = len(json.dumps(history))
+    # Serialize each entry once; list sizes are derived from these
+    sizes = [len(orjson.dumps(entry)) for entry in history]
+    chars_before = _list_size(sizes)
     
     log.info(f"Compacting history: {original_count} entries, {chars_before} chars")
     
     # If history is small enough, return as-is
     if len(history) <= keep_last or chars_before <= input.budget_chars:
         log.info("History within budget, no compaction needed")
-        return MemoryCompactorOutput(
+        return MemoryCompactorOutput.model_construct(
             compacted_history=history,
             original_count=original_count,
             compacted_count=original_count,
@@ -48,34 +78,49 @@ async def memory_compactor(input: MemoryCompactorInput) -> MemoryCompactorOutput
             chars_after=chars_before
         )
     
-    # Split: keep tail, summarize head
+    # Split: keep tail, fit head into per-tier budgets
     tail = history[-keep_last:]
-    head = history[:-keep_last]
-    
-    # Create summary entry
-    summary_entry = {
-        "ts": head[0]["ts"] if head else 0,
-        "kind": "meta",
-        "name": "COMPACTED_HISTORY",
-        "inputs_digest": f"Summarized {len(head)} entries",
-        "result_digest": _create_summary(head),
-        "latency_ms": None,
-        "error": None,
-        "tags": ["compaction", "summary"],
-        "metadata": {
-            "original_count": len(head),
-            "time_range": [head[0]["ts"], head[-1]["ts"]] if head else []
-        }
+    head, head_sizes = _dedupe(history[:-keep_last], sizes[:-keep_last])
+    tail_sizes = sizes[-keep_last:]
+    head_budget = max(input.budget_chars * input.target_ratio - _list_size(tail_sizes), 0)
+    tier_pct = {
+        "persistent": input.persistent_budget_pct,
+        "session": input.session_budget_pct,
+        "ephemeral": input.ephemeral_budget_pct,
     }
     
-    # Combine: [summary] + tail
-    compacted = [summary_entry] + tail
-    chars_after = len(json.dumps(compacted))
+    # Age is measured from the newest entry, so scores are replay-stable
+    now = max(entry.get("ts", 0) for entry in history)
+    scores = [
+        _retention_score(entry, now, input.tau_seconds, input.importance_weights)
+        for entry in head
+    ]
+    
+    by_tier: dict[str, list[int]] = {tier: [] for tier in TIERS}
+    for i, entry in enumerate(head):
+        by_tier[_tier(entry)].append(i)
+    
+    kept: list[int] = []
+    summaries: list[dict[str, Any]] = []
+    for tier, indices in by_tier.items():
+        tier_kept, evicted = _fit_tier(tier, indices, head_sizes, scores, head_budget * tier_pct[tier] / 100)
+        kept.extend(tier_kept)
+        if evicted:
+            summaries.append(_summary_entry(tier, [head[i] for i in evicted]))
+    kept.sort()
+    
+    # Combine: [tier summaries] + kept head entries + tail
+    compacted = summaries + [head[i] for i in kept] + tail
+    chars_after = _list_size(
+        [len(orjson.dumps(entry)) for entry in summaries]
+        + [head_sizes[i] for i in kept]
+        + tail_sizes
+    )
     
     log.info(f"Compaction complete: {original_count} -> {len(compacted)} entries, "
              f"{chars_before} -> {chars_after} chars")
     
-    return MemoryCompactorOutput(
+    return MemoryCompactorOutput.model_construct(
         compacted_history=compacted,
         original_count=original_count,
         compacted_count=len(compacted),
@@ -84,35 +129,178 @@ async def memory_compactor(input: MemoryCompactorInput) -> MemoryCompactorOutput
     )
 
 
+def _dedupe(
+    entries: list[dict[str, Any]], sizes: list[int]
+) -> tuple[list[dict[str, Any]], list[int]]:
+    """
+    Collapse repeated calls with the same (kind, name, inputs_digest) into
+    their first occurrence, counting the repeats in metadata["dup_count"].
+    Entries without an inputs_digest are never merged.
+    """
+    first: dict[tuple[str, str, str], int] = {}
+    dup_counts: dict[int, int] = {}
+    kept: list[int] = []
+    for i, entry in enumerate(entries):
+        digest = entry.get("inputs_digest")
+        if not digest:
+            kept.append(i)
+            continue
+        key = (entry.get("kind"), entry.get("name"), digest)
+        if key in first:
+            dup_counts[first[key]] = dup_counts.get(first[key], 0) + 1
+        else:
+            first[key] = i
+            kept.append(i)
+    
+    if not dup_counts:
+        return entries, sizes
+    
+    deduped: list[dict[str, Any]] = []
+    deduped_sizes: list[int] = []
+    for i in kept:
+        entry = entries[i]
+        size = sizes[i]
+        if i in dup_counts:
+            metadata = entry.get("metadata") or {}
+            entry = {
+                **entry,
+                "metadata": {**metadata, "dup_count": metadata.get("dup_count", 0) + dup_counts[i]},
+            }
+            size = len(orjson.dumps(entry))
+        deduped.append(entry)
+        deduped_sizes.append(size)
+    return deduped, deduped_sizes
+
+
+def _tier(entry: dict[str, Any]) -> str:
+    """Compaction tier of a history entry"""
+    kind = entry.get("kind")
+    if kind in ("meta", "plan"):
+        return "persistent"
+    if kind == "step" and "key" in entry.get("tags", ()):
+        return "session"
+    return "ephemeral"
+
+
+def _retention_score(
+    entry: dict[str, Any], now: float, tau_seconds: float, weights: dict[str, float]
+) -> float:
+    """Ebbinghaus-style retention: exp(-age / tau) scaled by importance"""
+    if entry.get("error"):
+        importance = weights.get("error", 2.0)
+    elif "key" in entry.get("tags", ()):
+        importance = weights.get("key", 1.0)
+    else:
+        importance = weights.get("default", 0.5)
+    age = max(now - entry.get("ts", 0), 0)
+    return math.exp(-age / tau_seconds) * importance
+
+
+def _fit_tier(
+    tier: str, indices: list[int], sizes: list[int], scores: list[float], budget: float
+) -> tuple[list[int], list[int]]:
+    """
+    Fit a tier's entries into its budget; returns (kept, evicted) indices.
+    Graded by overflow: under 5% is kept with a warning, up to 20% evicts
+    the lowest-retention entries until the rest fit, and beyond 20% the
+    ephemeral tier is summarized whole.
+    """
+    used = sum(sizes[i] + 1 for i in indices)  # +1 for the list comma
+    if used <= budget:
+        return indices, []
+    
+    overflow = (used - budget) / budget if budget else float("inf")
+    if overflow < 0.05:
+        log.warning(f"{tier} tier {overflow:.1%} over budget, kept verbatim")
+        return indices, []
+    if overflow > 0.20 and tier == "ephemeral":
+        return [], indices
+    
+    # Keep the highest-scoring entries that fit (newest first on ties)
+    kept: set[int] = set()
+    used = 0
+    for i in sorted(indices, key=lambda i: (scores[i], i), reverse=True):
+        used += sizes[i] + 1
+        if used > budget:
+            break
+        kept.add(i)
+    return (
+        [i for i in indices if i in kept],
+        [i for i in indices if i not in kept],
+    )
+
+
+def _summary_entry(tier: str, entries: list[dict[str, Any]]) -> dict[str, Any]:
+    """Summary history entry standing in for a tier's evicted entries"""
+    return {
+        "ts": entries[0]["ts"],
+        "kind": "meta",
+        "name": "COMPACTED_HISTORY",
+        "inputs_digest": _digest(entries),
+        "result_digest": _create_summary(entries),
+        "latency_ms": None,
+        "error": None,
+        "tags": ["compaction", "summary", tier],
+        "metadata": {
+            "tier": tier,
+            "original_count": len(entries),
+            "time_range": [entries[0]["ts"], entries[-1]["ts"]]
+        }
+    }
+
+
+def _digest(obj: Any) -> str:
+    """128-bit blake2b digest of an object's sorted-key JSON"""
+    data = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _list_size(sizes: list[int]) -> int:
+    """Serialized size of a JSON list from its element sizes (brackets + commas)"""
+    return sum(sizes) + max(len(sizes) - 1, 0) + 2
+
+
 def _create_summary(entries: list[dict[str, Any]]) -> str:
     """Create extractive summary of history entries"""
-    # Count by kind
-    by_kind: dict[str, int] = {}
-    errors = []
-    key_steps = []
+    # Count by kind: one packed add per entry; other kinds are not reported
+    packed = 0
+    delta = _KIND_DELTA.get
+    for entry in entries:
+        packed += delta(entry.get("kind"), 0)
+    plans, steps, observations, error_count = (
+        (packed >> shift) & _LANE_MASK for shift in (0, 32, 64, 96)
+    )
+    
+    # Collect errors and important steps, stopping once both caps are reached
+    errors: list[str] = []
+    key_steps: list[str] = []
+    add_error = errors.append
+    add_step = key_steps.append
     
     for entry in entries:
-        kind = entry.get("kind", "unknown")
-        by_kind[kind] = by_kind.get(kind, 0) + 1
-        
-        # Collect errors
-        if entry.get("error"):
-            errors.append(f"{entry.get('name')}: {entry.get('error')}")
-        
-        # Collect important steps
-        if kind == "step" and not entry.get("error"):
-            key_steps.append(entry.get("name"))
+        if len(errors) >= 3 and len(key_steps) >= 5:
+            break
+        error = entry.get("error")
+        if error:
+            if len(errors) < 3:
+                add_error(f"{entry.get('name')}: {error}")
+        elif len(key_steps) < 5 and entry.get("kind", "unknown") == "step":
+            add_step(entry.get("name"))
     
     summary_parts = [
         f"Executed {len(entries)} operations:",
-        f"  Plans: {by_kind.get('plan', 0)}, Steps: {by_kind.get('step', 0)}, "
-        f"Observations: {by_kind.get('obs', 0)}, Errors: {by_kind.get('error', 0)}"
+        f"  Plans: {plans}, Steps: {steps}, "
+        f"Observations: {observations}, Errors: {error_count}"
     ]
     
+    duplicates = sum(entry["metadata"].get("dup_count", 0) for entry in entries if entry.get("metadata"))
+    if duplicates:
+        summary_parts.append(f"  {duplicates} duplicate calls suppressed")
+    
     if key_steps:
-        summary_parts.append(f"  Key steps: {', '.join(key_steps[:5])}")
+        summary_parts.append(f"  Key steps: {', '.join(key_steps)}")
     
     if errors:
-        summary_parts.append(f"  Errors encountered: {'; '.join(errors[:3])}")
+        summary_parts.append(f"  Errors encountered: {'; '.join(errors)}")
     
     return " | ".join(summary_parts)
@@ -1,18 +1,47 @@
 """
 Memory I/O functions for snapshot persistence
 """
+import asyncio
 import json
 import os
+import struct
+import tempfile
+import orjson
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Literal
 from restack_ai.function import function, log
 from pydantic import BaseModel
 
+try:
+    import msgpack
+except ImportError:  # Only needed for snapshot_format="msgpack"
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Only needed for snapshot_compression="zstd"
+    zstandard = None
+
+# Per-snapshot file suffix per format (legacy layout); loading accepts either
+SNAPSHOT_SUFFIXES = {"json": ".json", "msgpack": ".msgpack"}
+
+# Pointer to the most recently saved snapshot, rewritten atomically per batch
+LATEST_POINTER = "LATEST"
+
+ZSTD_LEVEL = 3
+_zstd_compressor = None  # Created on first compressed save
+
 
 class SaveSnapshotInput(BaseModel):
     """Input for saving snapshot"""
     snapshot: dict[str, Any]  # Serialized AgentSnapshot
     snapshot_dir: str = "./snapshots"
+    format: Literal["json", "msgpack"] = "json"
+    compression: Literal["none", "zstd"] = "none"
+    batch_size: int = 8  # Max snapshots coalesced into one fsync
+    flush_interval_ms: int = 50  # Max wait for a batch to fill
+    flush_now: bool = False  # Write without waiting for more snapshots
 
 
 class SaveSnapshotOutput(BaseModel):
@@ -26,6 +55,7 @@ class LoadSnapshotInput(BaseModel):
     """Input for loading snapshot"""
     snapshot_id: str | None = None  # If None, load latest
     snapshot_dir: str = "./snapshots"
+    agent_name: str | None = None  # If set, look up this agent's files directly
 
 
 class LoadSnapshotOutput(BaseModel):
@@ -39,31 +69,21 @@ class LoadSnapshotOutput(BaseModel):
 @function.defn()
 async def save_snapshot(input: SaveSnapshotInput) -> SaveSnapshotOutput:
     """
-    Save agent snapshot to disk as JSONL (one line per snapshot for append-ability)
+    Append agent snapshot to the agent's history log and index it.
+    JSON snapshots are logged as JSONL; MessagePack snapshots as
+    length-prefixed records. `<agent>_index.jsonl` maps each snapshot_id
+    to the (offset, length) of its record so loads can seek straight to it.
+    With compression="zstd" each record is compressed on its own (so it can
+    still be read by offset) into a length-prefixed `.zst.log`.
+    Concurrent saves are coalesced so one fsync per file covers a batch.
     """
     try:
-        snapshot_dir = Path(input.snapshot_dir)
-        snapshot_dir.mkdir(parents=True, exist_ok=True)
-        
-        snapshot_id = input.snapshot["snapshot_id"]
-        agent_name = input.snapshot["agent_name"]
-        
-        # Save to individual file and append to log
-        file_path = snapshot_dir / f"{agent_name}_{snapshot_id}.json"
-        log_path = snapshot_dir / f"{agent_name}_history.jsonl"
-        
-        # Write individual snapshot
-        with open(file_path, "w") as f:
-            json.dump(input.snapshot, f, indent=2)
-        
-        # Append to history log
-        with open(log_path, "a") as f:
-            f.write(json.dumps(input.snapshot) + "\n")
+        log_path = await _write_behind.submit(input)
         
-        log.info(f"Snapshot saved: {file_path}")
+        log.info(f"Snapshot saved: {input.snapshot['snapshot_id']} -> {log_path}")
         
         return SaveSnapshotOutput(
-            file_path=str(file_path),
+            file_path=str(log_path),
             success=True
         )
     
@@ -81,6 +101,7 @@ async def load_snapshot(input: LoadSnapshotInput) -> LoadSnapshotOutput:
     """
     Load agent snapshot from disk.
     If snapshot_id is None, loads the latest snapshot.
+    Passing agent_name resolves the agent's files by name, without a directory scan.
     """
     try:
         snapshot_dir = Path(input.snapshot_dir)
@@ -92,32 +113,59 @@ async def load_snapshot(input: LoadSnapshotInput) -> LoadSnapshotOutput:
                 error=f"Snapshot directory not found: {snapshot_dir}"
             )
         
-        # If specific ID requested, load that file
-        if input.snapshot_id:
-            matching_files = list(snapshot_dir.glob(f"*_{input.snapshot_id}.json"))
-            if not matching_files:
-                return LoadSnapshotOutput(
-                    snapshot=None,
-                    success=False,
-                    error=f"Snapshot not found: {input.snapshot_id}"
-                )
-            file_path = matching_files[0]
+        # Indexed history logs first, then legacy per-snapshot files
+        found = _find_indexed(snapshot_dir, input.snapshot_id, input.agent_name)
+        if found:
+            index, entry = found
+            file_path = snapshot_dir / entry["log"]
+            snapshot = _read_entry(snapshot_dir, entry)
+            load_parent = lambda parent_id: _read_entry(snapshot_dir, index[parent_id])
         else:
-            # Load latest snapshot
-            json_files = list(snapshot_dir.glob("*.json"))
-            if not json_files:
-                return LoadSnapshotOutput(
-                    snapshot=None,
-                    success=False,
-                    error="No snapshots found"
+            # If specific ID requested, load that file
+            if input.snapshot_id and input.agent_name:
+                file_path = _legacy_snapshot_path(snapshot_dir, input.agent_name, input.snapshot_id)
+                if not file_path.exists():
+                    return LoadSnapshotOutput(
+                        snapshot=None,
+                        success=False,
+                        error=f"Snapshot not found: {input.snapshot_id}"
+                    )
+            elif input.snapshot_id:
+                matching_files = _scan_dir(
+                    snapshot_dir,
+                    tuple(f"_{input.snapshot_id}{suffix}" for suffix in SNAPSHOT_SUFFIXES.values()),
                 )
-            file_path = max(json_files, key=os.path.getmtime)
+                if not matching_files:
+                    return LoadSnapshotOutput(
+                        snapshot=None,
+                        success=False,
+                        error=f"Snapshot not found: {input.snapshot_id}"
+                    )
+                file_path = snapshot_dir / matching_files[0][0]
+            else:
+                # Load latest snapshot
+                snapshot_files = _scan_dir(snapshot_dir, tuple(SNAPSHOT_SUFFIXES.values()))
+                if input.agent_name:
+                    prefix = f"{input.agent_name}_"
+                    snapshot_files = [f for f in snapshot_files if f[0].startswith(prefix)]
+                if not snapshot_files:
+                    return LoadSnapshotOutput(
+                        snapshot=None,
+                        success=False,
+                        error="No snapshots found"
+                    )
+                file_path = snapshot_dir / max(snapshot_files, key=lambda f: f[1])[0]
+            
+            snapshot = _read_snapshot(file_path)
+            load_parent = lambda parent_id: _read_snapshot(
+                _legacy_snapshot_path(snapshot_dir, snapshot["agent_name"], parent_id)
+            )
         
-        # Read snapshot
-        with open(file_path, "r") as f:
-            snapshot = json.load(f)
+        # Compose delta chains into a full snapshot
+        if "parent_snapshot_id" in snapshot:
+            snapshot = _compose_delta(snapshot, load_parent)
         
-        log.info(f"Snapshot loaded: {file_path}")
+        log.info(f"Snapshot loaded: {snapshot['snapshot_id']} <- {file_path}")
         
         return LoadSnapshotOutput(
             snapshot=snapshot,
@@ -132,3 +180,354 @@ async def load_snapshot(input: LoadSnapshotInput) -> LoadSnapshotOutput:
             success=False,
             error=str(e)
         )
+
+
+def _load_index(index_path: Path) -> dict[str, dict[str, Any]]:
+    """Read an index file into snapshot_id -> entry, ordered oldest to newest"""
+    stat = index_path.stat()
+    return _parse_index(str(index_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=16)
+def _parse_index(index_path: str, mtime_ns: int, size: int) -> dict[str, dict[str, Any]]:
+    """Parse an index file; cached until the file's mtime or size changes"""
+    index: dict[str, dict[str, Any]] = {}
+    with open(index_path, "rb") as f:
+        for line in f:
+            entry = orjson.loads(line)
+            index.pop(entry["snapshot_id"], None)  # Re-saved ids move to the end
+            index[entry["snapshot_id"]] = entry
+    return index
+
+
+def _find_indexed(
+    snapshot_dir: Path, snapshot_id: str | None, agent_name: str | None = None
+) -> tuple[dict[str, dict[str, Any]], dict[str, Any]] | None:
+    """Find a snapshot's index entry (latest if snapshot_id is None)"""
+    if agent_name is not None:
+        try:
+            index = _load_index(snapshot_dir / f"{agent_name}_index.jsonl")
+        except FileNotFoundError:
+            return None
+        if snapshot_id is None:
+            return (index, next(reversed(index.values()))) if index else None
+        return (index, index[snapshot_id]) if snapshot_id in index else None
+    
+    if snapshot_id is None:
+        try:
+            pointer = orjson.loads((snapshot_dir / LATEST_POINTER).read_bytes())
+        except FileNotFoundError:
+            pointer = None  # Written before LATEST existed; fall back to a scan
+        if pointer:
+            index = _load_index(snapshot_dir / pointer["index"])
+            return index, index[pointer["snapshot_id"]]
+    
+    index_files = _scan_dir(snapshot_dir, ("_index.jsonl",))
+    if not index_files:
+        return None
+    
+    if snapshot_id is None:
+        index = _load_index(snapshot_dir / max(index_files, key=lambda f: f[1])[0])
+        if not index:
+            return None
+        return index, next(reversed(index.values()))
+    
+    for name, _ in index_files:
+        index = _load_index(snapshot_dir / name)
+        if snapshot_id in index:
+            return index, index[snapshot_id]
+    return None
+
+
+def _scan_dir(snapshot_dir: Path, suffixes: tuple[str, ...]) -> list[tuple[str, float]]:
+    """
+    List (name, mtime) of regular files ending in any of `suffixes`.
+    Uses scandir so mtimes come from the directory read, not a stat per file.
+    """
+    with os.scandir(snapshot_dir) as it:
+        return [
+            (entry.name, entry.stat().st_mtime)
+            for entry in it
+            if entry.name.endswith(suffixes) and entry.is_file(follow_symlinks=False)
+        ]
+
+
+def _read_entry(snapshot_dir: Path, entry: dict[str, Any]) -> dict[str, Any]:
+    """Read the snapshot record an index entry points at"""
+    return _read_record(
+        snapshot_dir / entry["log"],
+        entry["offset"],
+        entry["length"],
+        entry["format"],
+        entry.get("compression", "none"),
+    )
+
+
+@lru_cache(maxsize=64)
+def _read_record(
+    log_path: Path, offset: int, length: int, format: str, compression: str = "none"
+) -> dict[str, Any]:
+    """
+    Read one snapshot record from a history log by offset and length.
+    Logs are append-only, so records are cached in memory for repeated
+    replays; callers must treat the returned dict as read-only.
+    """
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("reading zstd snapshots requires the zstandard package")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    if format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("reading msgpack snapshots requires the msgpack package")
+        return msgpack.unpackb(data, raw=False)
+    return orjson.loads(data)
+
+
+def _legacy_snapshot_path(snapshot_dir: Path, agent_name: str, snapshot_id: str) -> Path:
+    """Path of a per-snapshot file, whichever format it was written in"""
+    stem = f"{agent_name}_{snapshot_id}"
+    for suffix in SNAPSHOT_SUFFIXES.values():
+        file_path = snapshot_dir / f"{stem}{suffix}"
+        if file_path.exists():
+            break
+    return file_path
+
+
+def _compose_delta(
+    delta: dict[str, Any], load_parent: Callable[[str], dict[str, Any]]
+) -> dict[str, Any]:
+    """
+    Rebuild a full snapshot from a delta by walking its parent chain back
+    to the nearest full snapshot, then replaying the deltas in order.
+    """
+    chain = [delta]
+    while "parent_snapshot_id" in chain[-1]:
+        chain.append(load_parent(chain[-1]["parent_snapshot_id"]))
+    
+    snapshot = chain.pop()
+    for step in reversed(chain):
+        history = snapshot["history"][:step["history_start"]] + step["history"]
+        artifacts = {**snapshot["artifacts"], **step["artifacts"]}
+        snapshot = {
+            **snapshot,
+            **{k: v for k, v in step.items() if k not in ("parent_snapshot_id", "history_start")},
+            "history": history,
+            "artifacts": artifacts,
+        }
+    return snapshot
+
+
+def _read_snapshot(file_path: Path) -> dict[str, Any]:
+    """Read a per-snapshot file in the format given by its suffix"""
+    if file_path.suffix == SNAPSHOT_SUFFIXES["msgpack"]:
+        if msgpack is None:
+            raise RuntimeError("reading .msgpack snapshots requires the msgpack package")
+        with open(file_path, "rb") as f:
+            return msgpack.unpackb(f.read(), raw=False)
+    with open(file_path, "r") as f:
+        return json.load(f)
+
+
+class _SnapshotWriteBehind:
+    """
+    Coalescing write-behind buffer for snapshot appends.
+    Saves are queued and drained by one background task, which waits up to
+    `flush_interval_ms` for up to `batch_size` records, appends them all,
+    then fsyncs each touched file once. A `flush_now` save closes its batch
+    immediately (used for the final snapshot on shutdown).
+    """
+    
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+    
+    async def submit(self, input: SaveSnapshotInput) -> Path:
+        """Queue a snapshot and wait until it is written and synced"""
+        if self._task is None or self._task.done():
+            # (Re)start the drainer on the current event loop
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._drain(self._queue))
+        
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((input, done))
+        return await done
+    
+    async def _drain(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            first = batch[0][0]
+            deadline = loop.time() + first.flush_interval_ms / 1000
+            
+            while len(batch) < first.batch_size and not batch[-1][0].flush_now:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # File writes and fsyncs block, so they run off the event loop
+            try:
+                results = await asyncio.to_thread(_write_batch, [input for input, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            
+            for (_, done), result in zip(batch, results):
+                if done.done():
+                    continue
+                if isinstance(result, Exception):
+                    done.set_exception(result)
+                else:
+                    done.set_result(result[0])
+
+
+def _write_batch(
+    inputs: list[SaveSnapshotInput],
+) -> list[tuple[Path, Path, dict[str, Any]] | Exception]:
+    """
+    Append a batch of snapshots, fsync each touched file once and update the
+    LATEST pointers; returns one (log path, index path, index entry) or
+    exception per input.
+    """
+    files: dict[Path, Any] = {}  # Open append handles, synced once at the end
+    
+    def append(path: Path, *chunks: bytes) -> int:
+        if path not in files:
+            files[path] = open(path, "ab")
+        f = files[path]
+        for chunk in chunks[:-1]:
+            f.write(chunk)
+        offset = f.tell()
+        f.write(chunks[-1])
+        return offset
+    
+    results: list[tuple[Path, Path, dict[str, Any]] | Exception] = []
+    try:
+        for input in inputs:
+            try:
+                results.append(_append_snapshot(input, append))
+            except Exception as e:
+                results.append(e)
+        
+        for f in files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        
+    except Exception as e:
+        results = [e] * len(inputs)
+    finally:
+        for f in files.values():
+            f.close()
+    
+    # Point LATEST at the last synced snapshot in each directory. The records
+    # are already durable, so a failed pointer only slows down "load latest"
+    # (it falls back to an index scan) and must not fail the batch.
+    latest: dict[Path, dict[str, Any]] = {}
+    for result in results:
+        if not isinstance(result, Exception):
+            log_path, index_path, index_entry = result
+            latest[log_path.parent] = {
+                "index": index_path.name,
+                "snapshot_id": index_entry["snapshot_id"],
+            }
+    for snapshot_dir, pointer in latest.items():
+        try:
+            _write_pointer(snapshot_dir, pointer)
+        except Exception as e:
+            log.warning(f"Failed to update {LATEST_POINTER} in {snapshot_dir}: {e}")
+    
+    return results
+
+
+def _write_pointer(snapshot_dir: Path, pointer: dict[str, Any]):
+    """
+    Atomically replace the LATEST pointer (write a unique tmp file, then
+    rename), so writers in other processes sharing the directory never
+    collide on the tmp name.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=snapshot_dir, prefix=f"{LATEST_POINTER}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(pointer))
+        os.replace(tmp_name, snapshot_dir / LATEST_POINTER)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _append_snapshot(
+    input: SaveSnapshotInput, append: Callable[..., int]
+) -> tuple[Path, Path, dict[str, Any]]:
+    """
+    Append one snapshot record and its index entry; returns the log path,
+    index path and index entry.
+    `append(path, *chunks)` writes the chunks and returns the offset of
+    the last one.
+    """
+    snapshot_dir = Path(input.snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    
+    snapshot_id = input.snapshot["snapshot_id"]
+    agent_name = input.snapshot["agent_name"]
+    
+    if input.compression == "zstd":
+        if input.format == "msgpack":
+            data = _pack_msgpack(input.snapshot)
+        else:
+            data = orjson.dumps(input.snapshot)
+        data = _zstd_compress(data)
+        
+        # Append length-prefixed compressed record to history log
+        log_path = snapshot_dir / f"{agent_name}_history.{input.format}.zst.log"
+        offset = append(log_path, struct.pack(">I", len(data)), data)
+    elif input.format == "msgpack":
+        data = _pack_msgpack(input.snapshot)
+        
+        # Append length-prefixed record to history log
+        log_path = snapshot_dir / f"{agent_name}_history.msgpack.log"
+        offset = append(log_path, struct.pack(">I", len(data)), data)
+    else:
+        data = orjson.dumps(input.snapshot, option=orjson.OPT_APPEND_NEWLINE)
+        
+        # Append to history log
+        log_path = snapshot_dir / f"{agent_name}_history.jsonl"
+        offset = append(log_path, data)
+    
+    # Index the record after it (same batch, same fsync)
+    index_entry = {
+        "snapshot_id": snapshot_id,
+        "log": log_path.name,
+        "offset": offset,
+        "length": len(data),
+        "format": input.format,
+        "compression": input.compression,
+    }
+    index_path = snapshot_dir / f"{agent_name}_index.jsonl"
+    append(index_path, orjson.dumps(index_entry, option=orjson.OPT_APPEND_NEWLINE))
+    return log_path, index_path, index_entry
+
+
+def _pack_msgpack(snapshot: dict[str, Any]) -> bytes:
+    """Serialize a snapshot to MessagePack"""
+    if msgpack is None:
+        raise RuntimeError("snapshot format 'msgpack' requires the msgpack package")
+    return msgpack.packb(snapshot, use_bin_type=True)
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    """Compress one record with the shared zstd compressor"""
+    global _zstd_compressor
+    if zstandard is None:
+        raise RuntimeError("snapshot compression 'zstd' requires the zstandard package")
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return _zstd_compressor.compress(data)
+
+
+_write_behind = _SnapshotWriteBehind()
@@ -1,9 +1,22 @@
 """
 Token counting utility for memory budget management
 """
+import asyncio
+from functools import lru_cache
 from restack_ai.function import function, log
 from pydantic import BaseModel
 
+try:
+    import tiktoken
+except ImportError:  # Fall back to the chars/4 heuristic
+    tiktoken = None
+
+TOKENIZER_ENCODING = "o200k_base"  # gpt-4o family
+
+_encoder = None  # Loaded once per process on first use
+
+OFFLOAD_MIN_CHARS = 32_000  # Encode longer texts in a thread, off the event loop
+
 
 class TokenCountInput(BaseModel):
     """Input for token counting function"""
@@ -19,16 +32,44 @@ class TokenCountOutput(BaseModel):
 @function.defn()
 async def token_count(input: TokenCountInput) -> TokenCountOutput:
     """
-    Estimate token count for text.
-    Uses simple heuristic: ~4 chars per token (conservative for GPT models)
+    Count tokens in text.
+    Uses tiktoken BPE when installed, otherwise ~4 chars per token
+    (conservative for GPT models)
     """
     char_count = len(input.text)
-    # Conservative estimate: 4 characters per token
-    estimated_tokens = char_count // 4
+    encoder = _get_encoder()
+    if encoder is not None:
+        # encode_ordinary skips the special-token scan
+        if char_count >= OFFLOAD_MIN_CHARS:
+            tokens = await asyncio.to_thread(encoder.encode_ordinary, input.text)
+            estimated_tokens = len(tokens)
+        else:
+            estimated_tokens = _count_tokens(input.text)
+    else:
+        # Conservative estimate: 4 characters per token
+        estimated_tokens = char_count // 4
     
     log.info(f"Counted {char_count} chars, ~{estimated_tokens} tokens")
     
-    return TokenCountOutput(
+    return TokenCountOutput.model_construct(
         char_count=char_count,
         estimated_tokens=estimated_tokens
     )
+
+
+def _get_encoder():
+    """Process-global tiktoken encoder, or None if unavailable"""
+    global _encoder
+    if _encoder is None and tiktoken is not None:
+        try:
+            _encoder = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:  # BPE ranks may need a download on first use
+            log.warning(f"tiktoken unavailable, using chars/4 estimate: {e}")
+            _encoder = False
+    return _encoder or None
+
+
+@lru_cache(maxsize=512)
+def _count_tokens(text: str) -> int:
+    """BPE token count for short texts, cached for repeated inputs"""
+    return len(_encoder.encode_ordinary(text))
@@ -0,0 +1,59 @@
+"""
+In-process result cache for tool functions
+"""
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, TypeVar
+import orjson
+from restack_ai.function import log
+from pydantic import BaseModel
+
+OutputT = TypeVar("OutputT", bound=BaseModel)
+
+
+def input_key(input: BaseModel) -> str:
+    """Stable hash of a tool input (sorted-key JSON, blake2b-128)"""
+    data = orjson.dumps(input.model_dump(), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def cached(
+    ttl: float = 3600,
+    maxsize: int = 256,
+    key: Callable[[Any], str] = input_key,
+) -> Callable[[Callable[..., Awaitable[OutputT]]], Callable[..., Awaitable[OutputT]]]:
+    """
+    Cache a tool's output by input for `ttl` seconds (LRU, `maxsize` entries).
+    Apply beneath @function.defn() so the registered function is the cached one.
+    """
+    def decorator(fn: Callable[..., Awaitable[OutputT]]) -> Callable[..., Awaitable[OutputT]]:
+        entries: OrderedDict[str, tuple[float, OutputT]] = OrderedDict()
+        stats = {"hits": 0, "misses": 0}
+        
+        @functools.wraps(fn)
+        async def wrapper(input):
+            k = key(input)
+            now = time.monotonic()
+            entry = entries.get(k)
+            if entry is not None and entry[0] > now:
+                entries.move_to_end(k)
+                stats["hits"] += 1
+                log.info(f"Cache hit for {fn.__name__} ({stats['hits']} hits, {stats['misses']} misses)")
+                return entry[1].model_copy()
+            
+            stats["misses"] += 1
+            log.info(f"Cache miss for {fn.__name__} ({stats['hits']} hits, {stats['misses']} misses)")
+            output = await fn(input)
+            entries[k] = (now + ttl, output)
+            entries.move_to_end(k)
+            if len(entries) > maxsize:
+                entries.popitem(last=False)
+            return output.model_copy()
+        
+        wrapper.cache_clear = entries.clear
+        wrapper.cache_stats = stats
+        return wrapper
+    
+    return decorator
@@ -0,0 +1,66 @@
+"""
+Content-addressed document store shared by tool functions.
+Files live on the local filesystem, so a function reading a reference
+(e.g. reviewer with document_ref) must run on a worker that can read the
+AGENT_WORKSPACE_DIR the writer (compile_writeup) used.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+def documents_dir() -> Path:
+    """
+    Directory under the agent workspace holding one file per content digest.
+    Read on each call, so AGENT_WORKSPACE_DIR from .env (loaded after import) applies.
+    """
+    return Path(os.getenv("AGENT_WORKSPACE_DIR", "./workspace")) / "documents"
+
+
+def document_path(ref: str, suffix: str = ".md") -> Path:
+    """File backing a document reference"""
+    return documents_dir() / f"{ref}{suffix}"
+
+
+def put_bytes(data: bytes, suffix: str) -> str:
+    """
+    Store raw bytes and return their reference (blake2b-128 of the data).
+    Identical content shares one file, so retries never rewrite it.
+    """
+    ref = hashlib.blake2b(data, digest_size=16).hexdigest()
+    path = document_path(ref, suffix)
+    if path.exists():
+        return ref
+    
+    # Unique temp file per writer: concurrent stores of the same content
+    # each rename their own copy, and the last identical one wins
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        if not path.exists():
+            raise
+    return ref
+
+
+def put_document(document: str) -> str:
+    """Store a markdown document and return its reference"""
+    return put_bytes(document.encode("utf-8"), ".md")
+
+
+def get_document(ref: str) -> str:
+    """Read a stored document by reference"""
+    path = document_path(ref)
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Document {ref} not found at {path}; the reading worker must share "
+            f"the writer's AGENT_WORKSPACE_DIR"
+        ) from None
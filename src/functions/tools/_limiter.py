@@ -0,0 +1,43 @@
+"""
+Sliding-window rate limiter for tool functions
+"""
+import asyncio
+import functools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+
+def sliding_window(
+    num_calls: int, period: float = 1.0
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Allow at most `num_calls` starts per `period` seconds. Calls go through
+    immediately while the window has room (bursts up to `num_calls`), and
+    only wait for the oldest start to age out once it is full.
+    The window is shared by every function decorated with the same returned
+    decorator, so the limit applies to their combined calls.
+    Apply beneath @cached so cache hits do not use up the window.
+    """
+    starts: deque[float] = deque()
+    
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def wrapper(input):
+            while True:
+                now = time.monotonic()
+                while starts and starts[0] <= now - period:
+                    starts.popleft()
+                if len(starts) < num_calls:
+                    starts.append(now)
+                    break
+                await asyncio.sleep(starts[0] + period - now)
+            return await fn(input)
+        
+        return wrapper
+    
+    return decorator
+
+
+# One window for all tools backed by external APIs: 10 calls/s combined per worker
+external_api_limit = sliding_window(num_calls=10, period=1.0)
@@ -1,6 +1,7 @@
 """
 Results collection tool
 """
+from statistics import fmean
 from restack_ai.function import function, log
 from pydantic import BaseModel
 
@@ -24,18 +25,20 @@ async def collect_results(input: CollectResultsInput) -> CollectResultsOutput:
     """
     log.info(f"Collecting results for {len(input.experiment_ids)} experiments")
     
-    # Mock results
+    # Mock metrics, computed once as a column and shared by results and summary
+    accuracies = [0.90 + i * 0.01 for i in range(len(input.experiment_ids))]
     results = [
         {
             "experiment_id": exp_id,
             "status": "completed",
-            "metrics": {"accuracy": 0.90 + i * 0.01}
+            "metrics": {"accuracy": accuracy}
         }
-        for i, exp_id in enumerate(input.experiment_ids)
+        for exp_id, accuracy in zip(input.experiment_ids, accuracies)
     ]
     
-    summary = f"Collected {len(results)} experiment results. Average accuracy: 0.91"
+    average = fmean(accuracies) if accuracies else 0.0
+    summary = f"Collected {len(results)} experiment results. Average accuracy: {average:.2f}"
     
     log.info(f"Results collected: {summary}")
     
-    return CollectResultsOutput(results=results, summary=summary)
+    return CollectResultsOutput.model_construct(results=results, summary=summary)
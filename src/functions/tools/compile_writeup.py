@@ -1,8 +1,10 @@
 """
 Writeup compilation tool
 """
+import io
 from restack_ai.function import function, log
 from pydantic import BaseModel
+from ._documents import document_path, put_document
 
 
 class CompileWriteupInput(BaseModel):
@@ -15,6 +17,7 @@ class CompileWriteupInput(BaseModel):
 class CompileWriteupOutput(BaseModel):
     """Output from writeup compilation"""
     document: str
+    document_ref: str | None = None  # Store key; pass to reviewer instead of the text
     file_path: str | None = None
 
 
@@ -22,22 +25,32 @@ class CompileWriteupOutput(BaseModel):
 async def compile_writeup(input: CompileWriteupInput) -> CompileWriteupOutput:
     """
     Compile research writeup from sections (mock implementation).
+    The document is also stored by content digest so later steps can take
+    `document_ref` instead of the full text.
     In production, generate LaTeX/PDF, handle citations, figures.
     """
     log.info(f"Compiling writeup: {input.title}")
     
-    # Build document
-    document_parts = [f"# {input.title}\n"]
+    # Build document in a single buffer
+    buf = io.StringIO()
+    write = buf.write
+    write("# ")
+    write(input.title)
+    write("\n")
     
     for section_name, content in input.sections.items():
-        document_parts.append(f"\n## {section_name}\n")
-        document_parts.append(content)
+        write("\n\n## ")
+        write(section_name)
+        write("\n\n")
+        write(content)
     
-    document = "\n".join(document_parts)
+    document = buf.getvalue()
+    ref = put_document(document)
     
-    log.info(f"Writeup compiled: {len(document)} characters")
+    log.info(f"Writeup compiled: {len(document)} characters ({ref})")
     
-    return CompileWriteupOutput(
+    return CompileWriteupOutput.model_construct(
         document=document,
-        file_path=None  # In production, save to file
+        document_ref=ref,
+        file_path=str(document_path(ref))
     )
@@ -3,6 +3,8 @@ Idea generation tool
 """
 from restack_ai.function import function, log
 from pydantic import BaseModel
+from ._cache import cached
+from ._limiter import external_api_limit
 
 
 class GenerateIdeasInput(BaseModel):
@@ -18,6 +20,8 @@ class GenerateIdeasOutput(BaseModel):
 
 
 @function.defn()
+@cached(ttl=3600)
+@external_api_limit
 async def generate_ideas(input: GenerateIdeasInput) -> GenerateIdeasOutput:
     """
     Generate research ideas (mock implementation).
@@ -36,4 +40,4 @@ async def generate_ideas(input: GenerateIdeasInput) -> GenerateIdeasOutput:
     
     log.info(f"Generated {len(ideas)} ideas")
     
-    return GenerateIdeasOutput(ideas=ideas)
+    return GenerateIdeasOutput.model_construct(ideas=ideas)
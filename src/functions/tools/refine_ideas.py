@@ -3,6 +3,11 @@ Idea refinement tool
 """
 from restack_ai.function import function, log
 from pydantic import BaseModel
+from ._cache import cached
+from ._limiter import external_api_limit
+
+# Shared by every refined idea in the mock
+_MOCK_SCORES = {"novelty_score": 0.8, "feasibility_score": 0.7, "impact_score": 0.9}
 
 
 class RefineIdeasInput(BaseModel):
@@ -17,6 +22,8 @@ class RefineIdeasOutput(BaseModel):
 
 
 @function.defn()
+@cached(ttl=3600)
+@external_api_limit
 async def refine_ideas(input: RefineIdeasInput) -> RefineIdeasOutput:
     """
     Refine and score research ideas (mock implementation).
@@ -26,16 +33,10 @@ async def refine_ideas(input: RefineIdeasInput) -> RefineIdeasOutput:
     
     # Mock refinement with scores
     refined = [
-        {
-            "idea": idea,
-            "novelty_score": 0.8,
-            "feasibility_score": 0.7,
-            "impact_score": 0.9,
-            "refined_description": f"Enhanced: {idea}"
-        }
+        {"idea": idea, **_MOCK_SCORES, "refined_description": f"Enhanced: {idea}"}
         for idea in input.ideas
     ]
     
     log.info(f"Refined {len(refined)} ideas")
     
-    return RefineIdeasOutput(refined_ideas=refined)
+    return RefineIdeasOutput.model_construct(refined_ideas=refined)
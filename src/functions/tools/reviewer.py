@@ -3,11 +3,15 @@ Review tool for quality assessment
 """
 from restack_ai.function import function, log
 from pydantic import BaseModel
+from ._cache import cached
+from ._documents import get_document
+from ._limiter import external_api_limit
 
 
 class ReviewerInput(BaseModel):
-    """Input for reviewer"""
-    content: str
+    """Input for reviewer; give either content or a stored document_ref"""
+    content: str | None = None
+    document_ref: str | None = None
     review_type: str = "general"
 
 
@@ -19,6 +23,8 @@ class ReviewerOutput(BaseModel):
 
 
 @function.defn()
+@cached(ttl=3600)
+@external_api_limit
 async def reviewer(input: ReviewerInput) -> ReviewerOutput:
     """
     Review content for quality (mock implementation).
@@ -26,10 +32,16 @@ async def reviewer(input: ReviewerInput) -> ReviewerOutput:
     """
     log.info(f"Reviewing content ({input.review_type})")
     
+    content = input.content
+    if content is None:
+        if input.document_ref is None:
+            raise ValueError("reviewer needs content or document_ref")
+        content = get_document(input.document_ref)
+    
     # Mock review
     feedback = (
         f"Content review for {input.review_type}:\n"
-        f"- Length: {len(input.content)} characters\n"
+        f"- Length: {len(content)} characters\n"
         f"- Structure: Well-organized\n"
         f"- Clarity: Good\n"
     )
@@ -42,7 +54,7 @@ async def reviewer(input: ReviewerInput) -> ReviewerOutput:
     
     log.info("Review completed")
     
-    return ReviewerOutput(
+    return ReviewerOutput.model_construct(
         feedback=feedback,
         score=0.85,
         suggestions=suggestions
@@ -39,14 +39,14 @@ async def run_experiment(input: RunExperimentInput) -> RunExperimentOutput:
         
         log.info(f"Experiment completed: {input.experiment_name}")
         
-        return RunExperimentOutput(
+        return RunExperimentOutput.model_construct(
             success=True,
             results=results
         )
     
     except Exception as e:
         log.error(f"Experiment failed: {e}")
-        return RunExperimentOutput(
+        return RunExperimentOutput.model_construct(
             success=False,
             results={},
             error=str(e)
@@ -3,24 +3,35 @@ Research tool functions for BaseModel Agent
 """
 from restack_ai.function import function, log
 from pydantic import BaseModel
+import orjson
+from ...models import Artifact
+from ._cache import cached
+from ._documents import document_path, put_bytes
+from ._limiter import external_api_limit
 
 
 class SearchPapersInput(BaseModel):
     """Input for searching research papers"""
     query: str
     max_results: int = 10
+    summary_only: bool = False  # Return title/url/year only; full records go to an artifact
 
 
 class SearchPapersOutput(BaseModel):
     """Output from paper search"""
     papers: list[dict]
     count: int
+    artifact: dict | None = None  # Serialized Artifact for papers_full.jsonl when summary_only
 
 
 @function.defn()
+@cached(ttl=3600)
+@external_api_limit
 async def search_papers(input: SearchPapersInput) -> SearchPapersOutput:
     """
     Search for research papers (mock implementation).
+    With summary_only, the full records (abstracts included) are written to
+    a JSONL artifact and only their summaries are returned.
     In production, integrate with arXiv, Semantic Scholar, etc.
     """
     log.info(f"Searching papers for: {input.query}")
@@ -39,4 +50,23 @@ async def search_papers(input: SearchPapersInput) -> SearchPapersOutput:
     
     log.info(f"Found {len(papers)} papers")
     
-    return SearchPapersOutput(papers=papers, count=len(papers))
+    if not input.summary_only:
+        return SearchPapersOutput.model_construct(papers=papers, count=len(papers), artifact=None)
+    
+    data = b"".join(orjson.dumps(paper) + b"\n" for paper in papers)
+    ref = put_bytes(data, ".jsonl")
+    artifact = Artifact(
+        name="papers_full.jsonl",
+        kind="file",
+        location=str(document_path(ref, ".jsonl")),
+        size_bytes=len(data),
+        checksum=ref,
+    )
+    summaries = [
+        {"title": paper["title"], "url": paper["url"], "year": paper["year"]}
+        for paper in papers
+    ]
+    
+    return SearchPapersOutput.model_construct(
+        papers=summaries, count=len(papers), artifact=artifact.model_dump()
+    )
@@ -2,7 +2,7 @@
 Models package - data contracts for BaseModel Agent
 """
 from .config import BaseModelConfig
-from .events import Task, HistoryEntry, Artifact, AgentSnapshot
+from .events import Task, HistoryEntry, Artifact, AgentSnapshot, AgentSnapshotDelta
 from .plan import Plan, PlanStep
 
 __all__ = [
@@ -11,6 +11,7 @@ __all__ = [
     "HistoryEntry",
     "Artifact",
     "AgentSnapshot",
+    "AgentSnapshotDelta",
     "Plan",
     "PlanStep",
 ]
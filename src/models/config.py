@@ -36,6 +36,11 @@ class BaseModelConfig(BaseModel):
     # Persistence
     snapshot_dir: str = "./snapshots"
     snapshot_interval: Optional[int] = None  # Steps between snapshots; None = after each task
+    snapshot_format: Literal["json", "msgpack"] = "json"  # msgpack needs the optional msgpack extra
+    snapshot_compression: Literal["none", "zstd"] = "none"  # zstd needs the optional zstd extra
+    snapshot_full_every: int = Field(default=10, description="Write a full snapshot every N snapshots, deltas in between")
+    snapshot_batch_size: int = Field(default=8, description="Max snapshots coalesced into one fsync")
+    snapshot_flush_interval_ms: int = Field(default=50, description="Max wait for a snapshot batch to fill")
     
     # Retry & resilience
     default_retry_attempts: int = 2
@@ -2,7 +2,7 @@
 Event and data models for BaseModel Agent
 """
 from typing import Any, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class Task(BaseModel):
@@ -27,6 +27,17 @@ class HistoryEntry(BaseModel):
     error: Optional[str] = Field(default=None, description="Error message if failed")
     tags: list[str] = Field(default_factory=list, description="Additional metadata tags")
     metadata: dict[str, Any] = Field(default_factory=dict, description="Extra structured data")
+    
+    _serialized_size: int = PrivateAttr(default=0)
+    
+    def model_post_init(self, __context: Any) -> None:
+        # Entries are append-only log records, so the size computed once stays valid
+        self._serialized_size = len(self.model_dump_json())
+    
+    @property
+    def serialized_size(self) -> int:
+        """Length of this entry's JSON serialization (cached at construction)"""
+        return self._serialized_size
 
 
 class Artifact(BaseModel):
@@ -55,3 +66,20 @@ class AgentSnapshot(BaseModel):
     cursors: dict[str, Any]
     stats: dict[str, Any]
     version: str = "0.1.0"
+
+
+class AgentSnapshotDelta(BaseModel):
+    """Incremental snapshot: only what changed since the parent snapshot"""
+    
+    snapshot_id: str
+    parent_snapshot_id: str  # Previous snapshot (full or delta) in the chain
+    agent_name: str
+    timestamp: float
+    inbox: list[dict[str, Any]]  # Serialized Task list (replaces parent's)
+    plan: Optional[dict[str, Any]]  # Serialized Plan (replaces parent's)
+    history_start: int  # Index in the composed history where `history` begins
+    history: list[dict[str, Any]]  # Serialized HistoryEntry list appended since parent
+    artifacts: dict[str, dict[str, Any]]  # Artifacts added since parent
+    cursors: dict[str, Any]
+    stats: dict[str, Any]
+    version: str = "0.1.0"
@@ -30,15 +30,34 @@ class Plan(BaseModel):
     
     def next_steps(self, completed: set[str]) -> list[PlanStep]:
         """Get steps ready to execute (dependencies met)"""
-        ready = []
+        bits, masks = self._dependency_masks()
+        done = 0
+        for name in completed:
+            done |= bits.get(name, 0)
+        # Ready: not completed itself, and every dependency bit is set
+        return [
+            step
+            for step, (bit, deps) in zip(self.steps, masks)
+            if not done & bit and deps & done == deps
+        ]
+    
+    def _dependency_masks(self) -> tuple[dict[str, int], list[tuple[int, int]]]:
+        """
+        Bitmask encoding of step names and dependencies (any width; Python ints).
+        Rebuilt on every call: steps and their depends_on lists are mutable.
+        """
+        bits: dict[str, int] = {}
+        for step in self.steps:
+            for name in (step.name, *step.depends_on):
+                if name not in bits:
+                    bits[name] = 1 << len(bits)
+        masks = []
         for step in self.steps:
-            # Skip if already completed
-            if step.name in completed:
-                continue
-            # Check if all dependencies are met
-            if all(dep in completed for dep in step.depends_on):
-                ready.append(step)
-        return ready
+            deps = 0
+            for dep in step.depends_on:
+                deps |= bits[dep]
+            masks.append((bits[step.name], deps))
+        return bits, masks
     
     def parallel_groups(self) -> dict[str, list[PlanStep]]:
         """Group steps by parallel execution group"""
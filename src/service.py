@@ -5,31 +5,22 @@ import asyncio
 import os
 from dotenv import load_dotenv
 from restack_ai import Restack
-from restack_ai.restack import ServiceOptions, ResourceOptions
+from restack_ai.restack import ServiceOptions
 
 from src.agents import BaseModelAgent
 from src.workflows import ResearchWorkflow, DocPipelineWorkflow
-from src.functions import (
-    save_snapshot,
-    load_snapshot,
-    memory_compactor,
-    token_count,
-    search_papers,
-    generate_ideas,
-    refine_ideas,
-    run_experiment,
-    collect_results,
-    compile_writeup,
-    reviewer,
-)
+from src.functions import ALL_TOOLS
 
 
 async def main():
     """Start the BaseModel Agent service"""
     
-    # Load environment variables
+    # Load environment variables (shell values take precedence)
     load_dotenv()
     
+    # Functions are mostly I/O-bound awaits; CPU-heavy ones offload to the default thread pool
+    max_concurrent_runs = int(os.getenv("MAX_CONCURRENT_RUNS", min(32, (os.cpu_count() or 4) * 8)))
+    
     # Initialize Restack client
     client = Restack()
     
@@ -40,40 +31,32 @@ async def main():
     await client.start_service(
         agents=[BaseModelAgent],
         workflows=[ResearchWorkflow, DocPipelineWorkflow],
-        functions=[
-            # Memory & persistence
-            save_snapshot,
-            load_snapshot,
-            memory_compactor,
-            token_count,
-            # Research tools
-            search_papers,
-            generate_ideas,
-            refine_ideas,
-            # Execution tools
-            run_experiment,
-            collect_results,
-            # Writing tools
-            compile_writeup,
-            reviewer,
-        ],
-    # No extra resources to register for now
-    resources=ResourceOptions(),
+        functions=list(ALL_TOOLS),
+        # No ResourceOptions: a resource-based tuner would ignore max_concurrent_function_runs
         # IMPORTANT: Use the default 'restack' task queue so UI and scheduler can find the service
         task_queue="restack",
         options=ServiceOptions(
-            rate_limit=10,  # Max 10 tasks per second
-            max_concurrent_function_runs=5,
+            # External-facing tools (search_papers, generate_ideas, refine_ideas,
+            # reviewer) share one in-process sliding window of 10 calls/s per
+            # worker process (functions/tools/_limiter.py), so bursts after idle
+            # gaps run immediately instead of waiting on a queue-wide rate.
+            # Other functions are local and unlimited.
+            max_concurrent_function_runs=max_concurrent_runs,
         ),
     )
     
     print("✓ Service started successfully!")
     print("  - Agent: BaseModelAgent")
     print("  - Workflows: ResearchWorkflow, DocPipelineWorkflow")
-    print("  - Functions: 11 tools registered")
+    print(f"  - Functions: {len(ALL_TOOLS)} tools registered")
     print("  - Task Queue: restack")
     print("\nService is running. Press Ctrl+C to stop.")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop  # Optional: faster libuv-based event loop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -4,27 +4,84 @@ Shutdown agent gracefully or cancel workflow
 import asyncio
 import argparse
 import os
-from dotenv import load_dotenv
-from restack_ai import Restack
-from temporalio.client import Client
+
+# Restack and Temporal clients (and dotenv) are imported only on the path that needs them
+
+# Engine settings for the Restack and Temporal clients; .env is only read if one is missing
+ENGINE_ENV_VARS = (
+    "RESTACK_ENGINE_ADDRESS",
+    "RESTACK_ENGINE_ID",
+    "RESTACK_ENGINE_API_KEY",
+    "RESTACK_ENGINE_API_ADDRESS",
+)
+
+EXAMPLES = """\
+examples:
+  Graceful shutdown:  python src/shutdown.py --agent-id <agent-id> --run-id <run-id>
+  Force cancel:       python src/shutdown.py --agent-id <agent-id> --cancel
+  Batch cancel:       python src/shutdown.py --agent-ids <id1>,<id2>,<id3> --cancel
+  Batch from file:    python src/shutdown.py --from-file agents.txt
+"""
+
+
+def _agent_ids(args: argparse.Namespace) -> list[str]:
+    """Agent IDs named on the command line, in order, without duplicates"""
+    if args.agent_id:
+        ids = [args.agent_id]
+    elif args.agent_ids:
+        ids = args.agent_ids.split(",")
+    else:
+        with open(args.from_file) as f:
+            ids = f.read().splitlines()
+    return list(dict.fromkeys(agent_id.strip() for agent_id in ids if agent_id.strip()))
+
+
+def _report(agent_ids: list[str], results: list, success: str, failure: str) -> None:
+    """Print one line per agent for a batch of gathered results"""
+    for agent_id, result in zip(agent_ids, results):
+        if isinstance(result, BaseException):
+            print(f"✗ {failure} {agent_id}: {result}")
+        else:
+            print(f"✓ {success} {agent_id}")
 
 
 async def main():
-    """Send shutdown event to agent or cancel workflow"""
+    """Send shutdown event to agents or cancel their workflows"""
     
-    parser = argparse.ArgumentParser(description="Shutdown BaseModel Agent")
-    parser.add_argument("--agent-id", required=True, help="Agent ID")
-    parser.add_argument("--run-id", help="Run ID (for graceful shutdown)")
-    parser.add_argument("--cancel", action="store_true", help="Force cancel workflow instead of graceful shutdown")
+    parser = argparse.ArgumentParser(
+        description="Shutdown BaseModel Agent",
+        epilog=EXAMPLES,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    agents = parser.add_mutually_exclusive_group(required=True)
+    agents.add_argument("--agent-id", help="Agent ID")
+    agents.add_argument("--agent-ids", help="Comma-separated agent IDs")
+    agents.add_argument("--from-file", help="File with one agent ID per line")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--run-id", help="Run ID (for graceful shutdown of a single agent; defaults to the latest run)")
+    mode.add_argument("--cancel", action="store_true", help="Force cancel workflow instead of graceful shutdown")
     args = parser.parse_args()
     
-    # Load environment variables
-    load_dotenv()
+    try:
+        agent_ids = _agent_ids(args)
+    except OSError as e:
+        parser.error(f"cannot read --from-file: {e}")
+    if not agent_ids:
+        parser.error("no agent IDs given")
+    if args.run_id and len(agent_ids) > 1:
+        parser.error("--run-id applies to a single agent")
+    
+    # Load environment variables, unless the shell already sets every engine setting
+    if not all(os.getenv(name) for name in ENGINE_ENV_VARS):
+        from dotenv import load_dotenv
+        load_dotenv()
     
     if args.cancel:
-        # Force cancel the workflow using Temporal client directly
-        workflow_id = f"local-{args.agent_id}"
-        print(f"Canceling workflow: {workflow_id}")
+        from temporalio.client import Client
+        
+        # Force cancel the workflows using Temporal client directly
+        workflow_ids = [f"local-{agent_id}" for agent_id in agent_ids]
+        print(f"Canceling {len(workflow_ids)} workflow(s): {', '.join(workflow_ids)}")
         
         try:
             # Get Restack engine address from environment
@@ -33,36 +90,43 @@ async def main():
             if engine_address.startswith("http://"):
                 engine_address = engine_address[7:]
             
-            # Connect to Temporal server (Restack engine port)
+            # Connect to Temporal server (Restack engine port) once for the whole batch
             print(f"Connecting to Restack engine at {engine_address}...")
             temporal_client = await Client.connect(engine_address)
-            handle = temporal_client.get_workflow_handle(workflow_id)
-            await handle.cancel()
-            print("✓ Workflow cancelled successfully")
         except Exception as e:
-            print(f"✗ Failed to cancel workflow: {e}")
-            print("Workflow may not be running or already completed.")
+            print(f"✗ Failed to connect: {e}")
+            return
+        
+        results = await asyncio.gather(
+            *(temporal_client.get_workflow_handle(workflow_id).cancel() for workflow_id in workflow_ids),
+            return_exceptions=True,
+        )
+        _report(workflow_ids, results, "Cancelled", "Failed to cancel")
+        if any(isinstance(result, BaseException) for result in results):
+            print("Failed workflows may not be running or already completed.")
     
-    elif args.run_id:
-        # Graceful shutdown using Restack client
+    else:
+        from restack_ai import Restack
+        
+        # Graceful shutdown using one Restack client for every agent
         client = Restack()
-        print(f"Sending shutdown signal to agent: {args.agent_id}")
+        print(f"Sending shutdown signal to {len(agent_ids)} agent(s): {', '.join(agent_ids)}")
         
-        await client.send_agent_event(
-            agent_id=args.agent_id,
-            run_id=args.run_id,
-            event_name="shutdown",
-            event_input={},
+        results = await asyncio.gather(
+            *(
+                client.send_agent_event(
+                    agent_id=agent_id,
+                    run_id=args.run_id,
+                    event_name="shutdown",
+                    event_input={},
+                )
+                for agent_id in agent_ids
+            ),
+            return_exceptions=True,
         )
         
-        print("✓ Shutdown signal sent")
-        print("Agent will complete current task and save final snapshot before shutting down.")
-    
-    else:
-        print("Error: Either --run-id or --cancel must be provided")
-        print("\nExamples:")
-        print(f"  Graceful shutdown:  python src/shutdown.py --agent-id {args.agent_id} --run-id <run-id>")
-        print(f"  Force cancel:       python src/shutdown.py --agent-id {args.agent_id} --cancel")
+        _report(agent_ids, results, "Shutdown signal sent to", "Failed to signal")
+        print("Agents will complete current task and save final snapshot before shutting down.")
 
 
 if __name__ == "__main__":
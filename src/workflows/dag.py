@@ -0,0 +1,54 @@
+"""
+Dependency-ordered concurrent execution of plan steps
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+from temporalio import workflow as temporal_workflow
+
+from ..models import PlanStep
+
+
+async def run_dag(
+    steps: list[PlanStep], run_step: Callable[[PlanStep], Awaitable[Any]]
+) -> int:
+    """
+    Run steps as soon as their dependencies complete, keeping every ready
+    step in flight at once. Returns the number of steps run; fewer than
+    len(steps) means some dependencies can never be met.
+    """
+    # Index the dependency graph once (Kahn), then launch steps as counts hit zero
+    pending = [len(set(step.depends_on)) for step in steps]
+    dependents: dict[str, list[int]] = defaultdict(list)
+    for i, step in enumerate(steps):
+        for dep in set(step.depends_on):
+            dependents[dep].append(i)
+    
+    running: dict[asyncio.Task, int] = {}
+    
+    def launch(i: int):
+        running[asyncio.create_task(run_step(steps[i]))] = i
+    
+    for i, count in enumerate(pending):
+        if count == 0:
+            launch(i)
+    
+    executed = 0
+    try:
+        while running:
+            # Deterministic wait; finished tasks are handled in launch order
+            done, _ = await temporal_workflow.wait(
+                list(running), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in [task for task in running if task in done]:
+                i = running.pop(task)
+                task.result()
+                executed += 1
+                for j in dependents[steps[i].name]:
+                    pending[j] -= 1
+                    if pending[j] == 0:
+                        launch(j)
+    finally:
+        for task in running:
+            task.cancel()
+    return executed
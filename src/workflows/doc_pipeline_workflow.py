@@ -1,13 +1,25 @@
 """
 Document Pipeline Workflow - From data collection to writeup
 """
+import asyncio
 from datetime import timedelta
 from restack_ai.workflow import workflow, log, RetryPolicy, import_functions
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+# Import functions using proper context manager (once, at module load)
+with import_functions():
+    from ..functions.tools import collect_results, compile_writeup, reviewer
+
+# Step retry policy and timeouts, built once
+_DEFAULT_RETRY = RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3)
+_TIMEOUT_60 = timedelta(seconds=60)
+_TIMEOUT_90 = timedelta(seconds=90)
+_TIMEOUT_120 = timedelta(seconds=120)
 
 
 class DocPipelineWorkflowInput(BaseModel):
     """Input for document pipeline workflow"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
     title: str
     experiment_ids: list[str]
     sections: dict[str, str]
@@ -15,6 +27,7 @@ class DocPipelineWorkflowInput(BaseModel):
 
 class DocPipelineWorkflowOutput(BaseModel):
     """Output from document pipeline workflow"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
     document: str
     review_feedback: str
     review_score: float
@@ -26,51 +39,45 @@ class DocPipelineWorkflow:
     """
     Document compilation and review pipeline.
     Steps:
-    1. Collect experimental results
-    2. Compile writeup
-    3. Review document
+    1. Collect experimental results and compile writeup (concurrently)
+    2. Review document
     """
     
     @workflow.run
     async def run(self, input: DocPipelineWorkflowInput) -> DocPipelineWorkflowOutput:
-        log.info(f"Starting doc pipeline for: {input.title}")
+        log.info("Starting doc pipeline", title=input.title)
         
-        # Import functions using proper context manager
-        with import_functions():
-            from ..functions.tools import collect_results, compile_writeup, reviewer
-        
-        # Step 1: Collect results
-        log.info("Step 1: Collecting results")
-        results = await workflow.step(
-            function=collect_results,
-            function_input={"experiment_ids": input.experiment_ids},
-            retry_policy=RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3),
-            start_to_close_timeout=timedelta(seconds=60)
-        )
-        
-        # Step 2: Compile writeup
-        log.info("Step 2: Compiling writeup")
-        writeup = await workflow.step(
-            function=compile_writeup,
-            function_input={
-                "title": input.title,
-                "sections": input.sections,
-                "format": "markdown"
-            },
-            retry_policy=RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3),
-            start_to_close_timeout=timedelta(seconds=120)
+        # Step 1: Collect results and compile writeup (independent, run concurrently)
+        log.info("Step 1: Collecting results and compiling writeup")
+        results, writeup = await asyncio.gather(
+            workflow.step(
+                function=collect_results,
+                function_input={"experiment_ids": input.experiment_ids},
+                retry_policy=_DEFAULT_RETRY,
+                start_to_close_timeout=_TIMEOUT_60
+            ),
+            workflow.step(
+                function=compile_writeup,
+                function_input={
+                    "title": input.title,
+                    "sections": input.sections,
+                    "format": "markdown"
+                },
+                retry_policy=_DEFAULT_RETRY,
+                start_to_close_timeout=_TIMEOUT_120
+            ),
         )
         
-        # Step 3: Review
-        log.info("Step 3: Reviewing document")
+        # Step 2: Review (needs the writeup, passed by reference)
+        log.info("Step 2: Reviewing document")
         review = await workflow.step(
             function=reviewer,
             function_input={
-                "content": writeup["document"],
+                "document_ref": writeup["document_ref"],
                 "review_type": "writeup"
             },
-            retry_policy=RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3),
-            start_to_close_timeout=timedelta(seconds=90)
+            retry_policy=_DEFAULT_RETRY,
+            start_to_close_timeout=_TIMEOUT_90
         )
         
         log.info("Doc pipeline complete")
@@ -1,13 +1,34 @@
 """
 Research Workflow - Multi-step research pipeline
 """
+import asyncio
 from datetime import timedelta
 from restack_ai.workflow import workflow, log, RetryPolicy, import_functions
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+from ..models import Artifact
+
+# Import functions using proper context manager (once, at module load)
+with import_functions():
+    from ..functions.tools import search_papers, generate_ideas, refine_ideas
+
+# Step retry policy and timeouts, built once
+_DEFAULT_RETRY = RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3)
+_TIMEOUT_60 = timedelta(seconds=60)
+_TIMEOUT_90 = timedelta(seconds=90)
+
+
+class Paper(BaseModel):
+    """Paper summary returned by search_papers; full records live in the artifact"""
+    model_config = ConfigDict(frozen=True)
+    title: str
+    url: str | None = None
+    year: int | None = None
 
 
 class ResearchWorkflowInput(BaseModel):
     """Input for research workflow"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
     topic: str
     max_papers: int = 10
     num_ideas: int = 5
@@ -15,7 +36,9 @@ class ResearchWorkflowInput(BaseModel):
 
 class ResearchWorkflowOutput(BaseModel):
     """Output from research workflow"""
-    papers: list[dict]
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    papers: list[Paper]
+    papers_artifact: Artifact | None = None  # Full paper records as JSONL
     ideas: list[str]
     refined_ideas: list[dict]
     status: str
@@ -26,50 +49,45 @@ class ResearchWorkflow:
     """
     Long-running research workflow.
     Steps:
-    1. Search for papers
-    2. Generate research ideas
-    3. Refine ideas with scoring
+    1. Search for papers and generate research ideas (concurrently)
+    2. Refine ideas with scoring
     """
     
     @workflow.run
     async def run(self, input: ResearchWorkflowInput) -> ResearchWorkflowOutput:
-        log.info(f"Starting research workflow for: {input.topic}")
-        
-        # Import functions using proper context manager
-        with import_functions():
-            from ..functions.tools import search_papers, generate_ideas, refine_ideas
-        
-        # Step 1: Search papers
-        log.info("Step 1: Searching papers")
-        papers_result = await workflow.step(
-            function=search_papers,
-            function_input={"query": input.topic, "max_results": input.max_papers},
-            retry_policy=RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3),
-            start_to_close_timeout=timedelta(seconds=60)
-        )
+        log.info("Starting research workflow", topic=input.topic)
         
-        # Step 2: Generate ideas
-        log.info("Step 2: Generating ideas")
-        ideas_result = await workflow.step(
-            function=generate_ideas,
-            function_input={"topic": input.topic, "num_ideas": input.num_ideas},
-            retry_policy=RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3),
-            start_to_close_timeout=timedelta(seconds=90)
+        # Step 1: Search papers and generate ideas (both need only the topic)
+        log.info("Step 1: Searching papers and generating ideas")
+        papers_result, ideas_result = await asyncio.gather(
+            workflow.step(
+                function=search_papers,
+                function_input={"query": input.topic, "max_results": input.max_papers, "summary_only": True},
+                retry_policy=_DEFAULT_RETRY,
+                start_to_close_timeout=_TIMEOUT_60
+            ),
+            workflow.step(
+                function=generate_ideas,
+                function_input={"topic": input.topic, "num_ideas": input.num_ideas},
+                retry_policy=_DEFAULT_RETRY,
+                start_to_close_timeout=_TIMEOUT_90
+            ),
         )
         
-        # Step 3: Refine ideas
-        log.info("Step 3: Refining ideas")
+        # Step 2: Refine ideas
+        log.info("Step 2: Refining ideas")
         refined_result = await workflow.step(
             function=refine_ideas,
             function_input={"ideas": ideas_result["ideas"]},
-            retry_policy=RetryPolicy(initial_interval=timedelta(seconds=10), maximum_attempts=3),
-            start_to_close_timeout=timedelta(seconds=90)
+            retry_policy=_DEFAULT_RETRY,
+            start_to_close_timeout=_TIMEOUT_90
         )
         
         log.info("Research workflow complete")
         
         return ResearchWorkflowOutput(
             papers=papers_result["papers"],
+            papers_artifact=papers_result.get("artifact"),
             ideas=ideas_result["ideas"],
             refined_ideas=refined_result["refined_ideas"],
             status="completed"
@@ -0,0 +1,79 @@
+"""
+Tests for dependency-ordered plan execution
+"""
+import asyncio
+import pytest
+from src.models import PlanStep
+from src.workflows.dag import run_dag
+
+
+class TestRunDag:
+    """Test run_dag scheduling"""
+    
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently(self):
+        """Ready steps are in flight together; dependents start once all deps finish"""
+        steps = [
+            PlanStep(name="a", inputs={}),
+            PlanStep(name="b", inputs={}),
+            PlanStep(name="c", inputs={}, depends_on=["a", "b"]),
+        ]
+        events = []
+        started = []
+        both_started = asyncio.Event()
+        
+        async def run_step(step):
+            events.append(("start", step.name))
+            if step.name in ("a", "b"):
+                # Times out unless a and b are running at the same time
+                started.append(step.name)
+                if len(started) == 2:
+                    both_started.set()
+                await asyncio.wait_for(both_started.wait(), timeout=1)
+            events.append(("end", step.name))
+        
+        assert await run_dag(steps, run_step) == 3
+        assert events[:2] == [("start", "a"), ("start", "b")]
+        assert events[-2:] == [("start", "c"), ("end", "c")]
+    
+    @pytest.mark.asyncio
+    async def test_unsatisfiable_dependencies_are_not_run(self):
+        """Steps whose dependencies never complete are skipped and not counted"""
+        steps = [
+            PlanStep(name="a", inputs={}),
+            PlanStep(name="b", inputs={}, depends_on=["missing"]),
+            PlanStep(name="c", inputs={}, depends_on=["b"]),
+        ]
+        ran = []
+        
+        async def run_step(step):
+            ran.append(step.name)
+        
+        assert await run_dag(steps, run_step) == 1
+        assert ran == ["a"]
+    
+    @pytest.mark.asyncio
+    async def test_failure_cancels_in_flight_steps(self):
+        """A failing step propagates its error and cancels the steps still running"""
+        steps = [
+            PlanStep(name="fails", inputs={}),
+            PlanStep(name="slow", inputs={}),
+            PlanStep(name="after", inputs={}, depends_on=["fails"]),
+        ]
+        cancelled = asyncio.Event()
+        ran = []
+        
+        async def run_step(step):
+            ran.append(step.name)
+            if step.name == "fails":
+                raise RuntimeError("boom")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        with pytest.raises(RuntimeError, match="boom"):
+            await run_dag(steps, run_step)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert "after" not in ran
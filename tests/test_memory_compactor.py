@@ -0,0 +1,120 @@
+"""
+Tests for tiered memory compaction
+"""
+import orjson
+import pytest
+from pydantic import ValidationError
+from src.functions.memory_compactor import (
+    MemoryCompactorInput,
+    _compact,
+    _dedupe,
+    _fit_tier,
+    _list_size,
+    _retention_score,
+    _tier,
+)
+
+
+def entry(ts, kind="step", name="tool", digest="", tags=(), error=None):
+    """Serialized HistoryEntry"""
+    return {
+        "ts": ts,
+        "kind": kind,
+        "name": name,
+        "inputs_digest": digest,
+        "result_digest": "",
+        "latency_ms": None,
+        "error": error,
+        "tags": list(tags),
+        "metadata": {},
+    }
+
+
+class TestCompactorHelpers:
+    """Test sizing, tiering, scoring and dedupe"""
+    
+    @pytest.mark.parametrize("items", [[], [{}], [{"a": 1}, "x", [1, 2], None]])
+    def test_list_size_matches_serialized_list(self, items):
+        """_list_size adds brackets and commas to the element sizes"""
+        sizes = [len(orjson.dumps(item)) for item in items]
+        assert _list_size(sizes) == len(orjson.dumps(items))
+    
+    def test_tier_assignment(self):
+        """meta/plan are persistent, key steps session, everything else ephemeral"""
+        assert _tier(entry(0, kind="meta")) == "persistent"
+        assert _tier(entry(0, kind="plan")) == "persistent"
+        assert _tier(entry(0, kind="step", tags=["key"])) == "session"
+        assert _tier(entry(0, kind="step")) == "ephemeral"
+        assert _tier(entry(0, kind="obs", tags=["key"])) == "ephemeral"
+    
+    def test_retention_score(self):
+        """Score decays with age and is weighted by importance"""
+        weights = {"error": 2.0, "key": 1.0, "default": 0.5}
+        assert _retention_score(entry(100), 100, 3600, weights) == 0.5
+        assert _retention_score(entry(100, error="boom"), 100, 3600, weights) == 2.0
+        assert _retention_score(entry(100, tags=["key"]), 100, 3600, weights) == 1.0
+        assert _retention_score(entry(0), 3600, 3600, weights) < _retention_score(entry(3000), 3600, 3600, weights)
+    
+    def test_fit_tier_graded_overflow(self):
+        """<5% over keeps all, 5-20% evicts lowest scores, >20% drops ephemeral whole"""
+        indices = [0, 1]
+        sizes = [10, 10]  # 22 chars with list commas
+        scores = [0.1, 0.9]
+        
+        assert _fit_tier("ephemeral", indices, sizes, scores, 30) == ([0, 1], [])
+        assert _fit_tier("ephemeral", indices, sizes, scores, 21.5) == ([0, 1], [])
+        assert _fit_tier("ephemeral", indices, sizes, scores, 20) == ([1], [0])
+        assert _fit_tier("ephemeral", indices, sizes, scores, 12) == ([], [0, 1])
+        # Only the ephemeral tier is dropped whole; others keep what fits
+        assert _fit_tier("session", indices, sizes, scores, 12) == ([1], [0])
+    
+    def test_dedupe_counts_repeats(self):
+        """Repeated (kind, name, inputs_digest) collapse into the first with dup_count"""
+        entries = [
+            entry(0, digest="d1"),
+            entry(1, digest="d1"),
+            entry(2, digest="d2"),
+            entry(3, digest="d1"),
+            entry(4),
+            entry(5),  # No digest: never merged
+        ]
+        sizes = [len(orjson.dumps(e)) for e in entries]
+        deduped, deduped_sizes = _dedupe(entries, sizes)
+        
+        assert [e["ts"] for e in deduped] == [0, 2, 4, 5]
+        assert deduped[0]["metadata"]["dup_count"] == 2
+        assert "dup_count" not in deduped[1]["metadata"]
+        assert deduped_sizes == [len(orjson.dumps(e)) for e in deduped]
+        assert entries[0]["metadata"] == {}  # Input entries are not mutated
+
+
+class TestCompact:
+    """Test end-to-end compaction"""
+    
+    def test_within_budget_is_unchanged(self):
+        """Small histories are returned as-is"""
+        history = [entry(i) for i in range(10)]
+        output = _compact(MemoryCompactorInput(history=history, budget_chars=1_000_000))
+        assert output.compacted_history == history
+        assert output.chars_before == output.chars_after == len(orjson.dumps(history))
+    
+    def test_compaction_summarizes_and_counts_duplicates(self):
+        """Evicted entries become a tier summary that reports suppressed duplicates"""
+        history = [entry(i, digest="same") for i in range(40)] + [entry(i, name=f"t{i}") for i in range(40, 80)]
+        output = _compact(MemoryCompactorInput(history=history, keep_last=5, budget_chars=2000))
+        
+        assert output.compacted_history[-5:] == history[-5:]
+        assert output.chars_after == len(orjson.dumps(output.compacted_history))
+        assert output.chars_after < output.chars_before
+        
+        summary = output.compacted_history[0]
+        assert summary["name"] == "COMPACTED_HISTORY"
+        assert summary["metadata"]["tier"] == "ephemeral"
+        assert "39 duplicate calls suppressed" in summary["result_digest"]
+    
+    def test_rejects_invalid_parameters(self):
+        """Zero decay constant and negative tier budgets are rejected"""
+        with pytest.raises(ValidationError):
+            MemoryCompactorInput(history=[], tau_seconds=0)
+        with pytest.raises(ValidationError):
+            MemoryCompactorInput(history=[], session_budget_pct=-1)
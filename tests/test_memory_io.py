@@ -0,0 +1,157 @@
+"""
+Tests for snapshot persistence (indexed history logs, deltas, LATEST pointer)
+"""
+import pytest
+from src.functions import memory_io
+from src.functions.memory_io import (
+    save_snapshot,
+    load_snapshot,
+    SaveSnapshotInput,
+    LoadSnapshotInput,
+)
+
+
+def full_snapshot(snapshot_id, history, agent_name="agent"):
+    """Serialized AgentSnapshot"""
+    return {
+        "snapshot_id": snapshot_id,
+        "agent_name": agent_name,
+        "timestamp": 0.0,
+        "config": {},
+        "inbox": [],
+        "plan": None,
+        "history": history,
+        "artifacts": {},
+        "cursors": {},
+        "stats": {},
+    }
+
+
+def delta_snapshot(snapshot_id, parent_snapshot_id, history_start, history, agent_name="agent"):
+    """Serialized AgentSnapshotDelta"""
+    return {
+        "snapshot_id": snapshot_id,
+        "parent_snapshot_id": parent_snapshot_id,
+        "agent_name": agent_name,
+        "timestamp": 0.0,
+        "inbox": [],
+        "plan": None,
+        "history_start": history_start,
+        "history": history,
+        "artifacts": {f"artifact_{snapshot_id}": {"name": snapshot_id}},
+        "cursors": {},
+        "stats": {},
+    }
+
+
+async def save(tmp_path, snapshot, format="json", compression="none"):
+    output = await save_snapshot(SaveSnapshotInput(
+        snapshot=snapshot,
+        snapshot_dir=str(tmp_path),
+        format=format,
+        compression=compression,
+        flush_now=True,
+    ))
+    assert output.success, output.error
+    return output
+
+
+async def load(tmp_path, snapshot_id=None, agent_name=None):
+    output = await load_snapshot(LoadSnapshotInput(
+        snapshot_id=snapshot_id, snapshot_dir=str(tmp_path), agent_name=agent_name
+    ))
+    assert output.success, output.error
+    return output.snapshot
+
+
+class TestSnapshotRoundTrip:
+    """Save/load round trips across formats and compression"""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("format", ["json", "msgpack"])
+    @pytest.mark.parametrize("compression", ["none", "zstd"])
+    async def test_full_and_delta(self, tmp_path, format, compression):
+        """Full snapshots load as saved; deltas compose onto their parent chain"""
+        if format == "msgpack":
+            pytest.importorskip("msgpack")
+        if compression == "zstd":
+            pytest.importorskip("zstandard")
+        
+        await save(tmp_path, full_snapshot("s1", [{"i": 0}, {"i": 1}]), format, compression)
+        await save(tmp_path, delta_snapshot("s2", "s1", 2, [{"i": 2}]), format, compression)
+        await save(tmp_path, delta_snapshot("s3", "s2", 1, [{"i": 9}]), format, compression)
+        
+        s1 = await load(tmp_path, "s1")
+        assert s1 == full_snapshot("s1", [{"i": 0}, {"i": 1}])
+        
+        s2 = await load(tmp_path, "s2")
+        assert s2["snapshot_id"] == "s2"
+        assert s2["history"] == [{"i": 0}, {"i": 1}, {"i": 2}]
+        assert "parent_snapshot_id" not in s2
+        assert s2["config"] == {}  # Carried over from the full snapshot
+        
+        # history_start rewinds into the composed parent history
+        s3 = await load(tmp_path, "s3")
+        assert s3["history"] == [{"i": 0}, {"i": 9}]
+        assert set(s3["artifacts"]) == {"artifact_s2", "artifact_s3"}
+    
+    @pytest.mark.asyncio
+    async def test_load_latest(self, tmp_path):
+        """snapshot_id=None loads the most recently saved snapshot"""
+        await save(tmp_path, full_snapshot("s1", [{"i": 0}]))
+        await save(tmp_path, delta_snapshot("s2", "s1", 1, [{"i": 1}]))
+        
+        latest = await load(tmp_path)
+        assert latest["snapshot_id"] == "s2"
+        assert latest["history"] == [{"i": 0}, {"i": 1}]
+    
+    @pytest.mark.asyncio
+    async def test_load_by_agent_name(self, tmp_path):
+        """agent_name picks that agent's snapshots when several share a directory"""
+        await save(tmp_path, full_snapshot("a1", [{"agent": "a"}], agent_name="alpha"))
+        await save(tmp_path, full_snapshot("b1", [{"agent": "b"}], agent_name="beta"))
+        
+        alpha = await load(tmp_path, agent_name="alpha")
+        assert alpha["snapshot_id"] == "a1"
+        assert (await load(tmp_path))["snapshot_id"] == "b1"
+        assert (await load(tmp_path, "b1", agent_name="beta"))["history"] == [{"agent": "b"}]
+        
+        missing = await load_snapshot(LoadSnapshotInput(
+            snapshot_id="b1", snapshot_dir=str(tmp_path), agent_name="alpha"
+        ))
+        assert not missing.success
+    
+    @pytest.mark.asyncio
+    async def test_missing_snapshot(self, tmp_path):
+        """Unknown ids and directories fail without raising"""
+        await save(tmp_path, full_snapshot("s1", []))
+        output = await load_snapshot(LoadSnapshotInput(snapshot_id="nope", snapshot_dir=str(tmp_path)))
+        assert not output.success
+        output = await load_snapshot(LoadSnapshotInput(snapshot_dir=str(tmp_path / "missing")))
+        assert not output.success
+    
+    @pytest.mark.asyncio
+    async def test_run_scoped_ids_do_not_cross_runs(self, tmp_path):
+        """A later run's snapshots never become parents of an earlier run's deltas"""
+        # Agent snapshot ids are snapshot_<run_id>_<seq>
+        await save(tmp_path, full_snapshot("snapshot_run1_1", [{"run": 1, "i": 0}]))
+        await save(tmp_path, delta_snapshot("snapshot_run1_2", "snapshot_run1_1", 1, [{"run": 1, "i": 1}]))
+        await save(tmp_path, delta_snapshot("snapshot_run1_3", "snapshot_run1_2", 2, [{"run": 1, "i": 2}]))
+        await save(tmp_path, full_snapshot("snapshot_run2_1", [{"run": 2, "i": 0}]))
+        
+        old = await load(tmp_path, "snapshot_run1_3")
+        assert old["history"] == [{"run": 1, "i": 0}, {"run": 1, "i": 1}, {"run": 1, "i": 2}]
+        assert (await load(tmp_path))["snapshot_id"] == "snapshot_run2_1"
+    
+    @pytest.mark.asyncio
+    async def test_pointer_failure_keeps_snapshot(self, tmp_path, monkeypatch):
+        """A failed LATEST update does not fail a save whose record is already synced"""
+        def fail(snapshot_dir, pointer):
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(memory_io, "_write_pointer", fail)
+        await save(tmp_path, full_snapshot("s1", [{"i": 0}]))
+        
+        assert not (tmp_path / memory_io.LATEST_POINTER).exists()
+        assert (await load(tmp_path, "s1"))["history"] == [{"i": 0}]
+        assert (await load(tmp_path))["snapshot_id"] == "s1"  # Falls back to an index scan
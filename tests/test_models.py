@@ -81,6 +81,25 @@ class TestModels:
         assert len(ready) == 1
         assert ready[0].name == "step3"
     
+    def test_plan_next_steps_after_mutation(self):
+        """Test dependency resolution sees steps edited in place"""
+        plan = Plan(
+            plan_id="plan-1",
+            task_id="task-1",
+            steps=[
+                PlanStep(name="a", inputs={}),
+                PlanStep(name="b", inputs={}, depends_on=["a"]),
+            ],
+            created_at=1234567890.0
+        )
+        assert [step.name for step in plan.next_steps(completed=set())] == ["a"]
+        
+        plan.steps[1].depends_on.append("zzz")
+        assert plan.next_steps(completed={"a"}) == []
+        
+        plan.steps[1] = PlanStep(name="c", inputs={})
+        assert [step.name for step in plan.next_steps(completed=set())] == ["a", "c"]
+    
     def test_history_entry_creation(self):
         """Test history entry model"""
         entry = HistoryEntry(
@@ -94,6 +113,12 @@ class TestModels:
         assert entry.name == "test_function"
         assert entry.latency_ms == 150
     
+    def test_history_entry_serialized_size(self):
+        """Test history entry caches its serialized size"""
+        entry = HistoryEntry(kind="step", name="test_function", tags=["key"])
+        assert entry.serialized_size == len(entry.model_dump_json())
+        assert "serialized_size" not in entry.model_dump()
+    
     def test_artifact_creation(self):
         """Test artifact model"""
         artifact = Artifact(
@@ -0,0 +1,130 @@
+"""
+Tests for tool function wrappers (result cache, rate limiter)
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from pydantic import BaseModel
+from src.functions.tools import _cache
+from src.functions.tools._cache import cached
+from src.functions.tools._limiter import sliding_window
+
+
+class EchoInput(BaseModel):
+    """Input for the test tool"""
+    value: int
+
+
+class EchoOutput(BaseModel):
+    """Output from the test tool"""
+    value: int
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the cache module"""
+    now = SimpleNamespace(t=0.0)
+    monkeypatch.setattr(_cache, "time", SimpleNamespace(monotonic=lambda: now.t))
+    return now
+
+
+def echo_tool(calls, **cache_options):
+    """Cached tool that records the inputs it actually ran with"""
+    @cached(**cache_options)
+    async def echo(input: EchoInput) -> EchoOutput:
+        calls.append(input.value)
+        return EchoOutput(value=input.value)
+    
+    return echo
+
+
+class TestCached:
+    """Test the TTL/LRU result cache"""
+    
+    @pytest.mark.asyncio
+    async def test_hits_and_misses(self, clock):
+        """Repeated inputs are served from cache and counted"""
+        calls = []
+        echo = echo_tool(calls)
+        
+        first = await echo(EchoInput(value=1))
+        second = await echo(EchoInput(value=1))
+        await echo(EchoInput(value=2))
+        
+        assert calls == [1, 2]
+        assert first == second and first is not second  # Callers get copies
+        assert echo.cache_stats == {"hits": 1, "misses": 2}
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, clock):
+        """Entries are recomputed once their TTL has passed"""
+        calls = []
+        echo = echo_tool(calls, ttl=10)
+        
+        await echo(EchoInput(value=1))
+        clock.t = 9.9
+        await echo(EchoInput(value=1))
+        clock.t = 10.0
+        await echo(EchoInput(value=1))
+        
+        assert calls == [1, 1]
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, clock):
+        """The least recently used entry is evicted beyond maxsize"""
+        calls = []
+        echo = echo_tool(calls, maxsize=2)
+        
+        await echo(EchoInput(value=1))
+        await echo(EchoInput(value=2))
+        await echo(EchoInput(value=1))  # 2 is now least recently used
+        await echo(EchoInput(value=3))  # Evicts 2
+        await echo(EchoInput(value=1))
+        await echo(EchoInput(value=2))
+        
+        assert calls == [1, 2, 3, 2]
+    
+    @pytest.mark.asyncio
+    async def test_cache_clear(self, clock):
+        """cache_clear drops all entries"""
+        calls = []
+        echo = echo_tool(calls)
+        
+        await echo(EchoInput(value=1))
+        echo.cache_clear()
+        await echo(EchoInput(value=1))
+        
+        assert calls == [1, 1]
+
+
+class TestSlidingWindow:
+    """Test the sliding-window rate limiter"""
+    
+    @pytest.mark.asyncio
+    async def test_window_is_shared_across_functions(self):
+        """Functions decorated by one window share its limit; bursts go through at once"""
+        limit = sliding_window(num_calls=2, period=0.2)
+        starts = []
+        
+        @limit
+        async def first(input):
+            starts.append(time.monotonic())
+        
+        @limit
+        async def second(input):
+            starts.append(time.monotonic())
+        
+        begin = time.monotonic()
+        await asyncio.gather(first(None), second(None), first(None))
+        
+        assert starts[1] - begin < 0.1  # First two calls are a burst
+        assert starts[2] - begin >= 0.2  # Third waits for the oldest to age out
+    
+    @pytest.mark.asyncio
+    async def test_separate_windows_are_independent(self):
+        """Each sliding_window(...) call has its own window"""
+        first = sliding_window(num_calls=1, period=10)(asyncio.sleep)
+        second = sliding_window(num_calls=1, period=10)(asyncio.sleep)
+        
+        await asyncio.wait_for(asyncio.gather(first(0), second(0)), timeout=1)